@@ -1,7 +1,18 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
-import io
+from datetime import datetime, date
+import os
+import time
+import uuid
+
+from recorder import (
+    ACTION_EFFECTS, load_roster, Match, EventJournal, XLSX_MIME,
+    PerfLog, RerunProfiler, approx_size_kib, SeasonStore, STATS_ROWS, stats_html, match_metrics, MatchHub,
+    anchor_at, clip_list, clips_csv, clips_edl, parse_video_time, video_clock,
+    build_workbook, SessionCache, SessionRegistry, ExportPool,
+)
+
+RERUN_STARTED = time.perf_counter()  # 整頁 rerun 計時起點
 
 # ==========================================
 # 0. 頁面設定與 CSS
@@ -85,143 +96,199 @@ st.markdown("""
 # 1. 資料與定義
 # ==========================================
 
-ROSTER_DB = [
-    {"背號": "1", "姓名": "舉球A", "位置": "S"},
-    {"背號": "2", "姓名": "大砲B", "位置": "LH"},
-    {"背號": "3", "姓名": "大砲C", "位置": "LH"},
-    {"背號": "4", "姓名": "攔中D", "位置": "MB"},
-    {"背號": "5", "姓名": "攔中E", "位置": "MB"},
-    {"背號": "6", "姓名": "舉對F", "位置": "RH"},
-    {"背號": "7", "姓名": "自由G", "位置": "L"},
-    {"背號": "8", "姓名": "替補H", "位置": "LH"},
-    {"背號": "9", "姓名": "替補I", "位置": "MB"},
-]
-
-# 統計表順序
-ORDERED_ROWS = [
-    # 繼續
-    "發球繼續", "攔網繼續", "接發繼續", "接發好球繼續", 
-    "接球繼續", "接球好球繼續", "舉球繼續", "舉球好球繼續", 
-    "攻擊擊球繼續", "送球繼續",
-    # 得分
-    "發球得分", "直接得分", "對手接噴", "打手得分", "吊球得分", "送球得分", "攔網得分", 
-    "對手失誤(總計)", 
-    # 失誤
-    "發球出界", "發球掛網", "發球犯規", 
-    "攻擊出界", "攻擊掛網", "攻擊被攔", "送球失誤", "攻擊犯規", 
-    "舉球失誤", "舉球犯規", 
-    "接發失誤", "站位失誤", "接球失誤", "防守犯規", 
-    "攔網失誤", "攔網犯規"
-]
-
-# 用於計算總分的清單
-SCORE_ROWS_LIST = ["發球得分", "直接得分", "對手接噴", "打手得分", "吊球得分", "送球得分", "攔網得分"]
-ERROR_ROWS_LIST = ["發球出界", "發球掛網", "發球犯規", "攻擊出界", "攻擊掛網", "攻擊被攔", "送球失誤", "攻擊犯規", 
-                   "舉球失誤", "舉球犯規", "接發失誤", "站位失誤", "接球失誤", "防守犯規", "攔網失誤", "攔網犯規"]
-
-# 動作分數影響
-ACTION_EFFECTS = {
-    "發球": 0, "攔網": 0, "接發A": 0, "接發B": 0, "接球A": 0, "接球B": 0, 
-    "舉球": 0, "舉球好球": 0, "攻擊": 0, "處理球": 0,
-    "發球得分": 1, "攻擊得分": 1, "吊球得分": 1, "後排得分": 1, "快攻得分": 1, "修正得分": 1, "打手得分": 1, "送球得分": 1, "攔網得分": 1,
-    "對手發球出界": 1, "對手發球掛網": 1, "對手發球犯規": 1, "對手攻擊出界": 1, "對手攻擊掛網": 1, "對手送球失誤": 1, 
-    "對手攻擊犯規": 1, "對手舉球失誤": 1, "對手舉球犯規": 1, "對手防守犯規": 1, "對手攔網犯規": 1,
-    "發球出界": -1, "發球掛網": -1, "發球犯規": -1,
-    "攻擊出界": -1, "攻擊掛網": -1, "攻擊被攔": -1, "攻擊犯規": -1, "觸網": -1, "送球失誤": -1,
-    "舉球失誤": -1, "連擊": -1,
-    "接發失誤": -1, "接球失誤": -1, "防守噴球": -1, "防守落地": -1, "站位失誤": -1, "防守犯規": -1,
-    "攔網觸網": -1, "攔網出界": -1, "攔網失誤": -1, "攔網犯規": -1
-}
-
-# 顯示名稱映射
-ACTION_MAP = {
-    "發球": "發球繼續", "攔網": "攔網繼續", "接發A": "接發好球繼續", "接發B": "接發繼續",
-    "接球A": "接球好球繼續", "接球B": "接球繼續", "舉球": "舉球繼續", "舉球好球": "舉球好球繼續",
-    "攻擊": "攻擊擊球繼續", "處理球": "送球繼續",
-    "發球得分": "發球得分", "攻擊得分": "直接得分", "吊球得分": "吊球得分", "後排得分": "直接得分", 
-    "快攻得分": "直接得分", "修正得分": "直接得分", "打手得分": "打手得分", "送球得分": "送球得分", "攔網得分": "攔網得分",
-    "對手接噴": "對手接噴",
-    "發球出界": "發球出界", "發球掛網": "發球掛網", "發球犯規": "發球犯規",
-    "攻擊出界": "攻擊出界", "攻擊掛網": "攻擊掛網", "攻擊被攔": "攻擊被攔", "攻擊犯規": "攻擊犯規", "送球失誤": "送球失誤",
-    "舉球失誤": "舉球失誤", "連擊": "舉球犯規",
-    "接發失誤": "接發失誤", "接球失誤": "接球失誤", "防守犯規": "防守犯規", "站位失誤": "站位失誤",
-    "攔網失誤": "攔網失誤", "攔網觸網": "攔網犯規", "攔網犯規": "攔網犯規", "攔網出界": "攔網失誤",
-    "觸網": "攻擊犯規", "防守噴球": "接球失誤", "防守落地": "接球失誤"
-}
+# 統計區展開時，檢查紀錄是否有變動的間隔
+STATS_REFRESH_SECONDS = 3
+
+# 觀看端 (?view=1 計分板 + 統計、?view=score 只有計分板) 檢查更新的間隔
+VIEWER_REFRESH_SECONDS = 2
+
+# 本機事件日誌 (斷線 / 重新整理 / 伺服器重啟後還原用)
+JOURNAL_PATH = os.environ.get(
+    "RECORDER_JOURNAL", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "journal.sqlite3")
+)
+
+# 賽季資料庫 (每場每局的紀錄，換局時存入)
+SEASON_PATH = os.environ.get(
+    "RECORDER_SEASON", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "season.sqlite3")
+)
+
+# 球員名單檔 (CSV / JSON，可放多隊；RECORDER_TEAM 指定隊伍)，沒設定時用內建名單
+ROSTER_PATH = os.environ.get("RECORDER_ROSTER")
+ROSTER_TEAM = os.environ.get("RECORDER_TEAM")
+
+# 每個 session 衍生資料 (表格、HTML、Excel) 的記憶體預算，與閒置多久後由伺服器清掉
+SESSION_BUDGET_KIB = int(os.environ.get("RECORDER_SESSION_KIB", 64 * 1024))
+SESSION_IDLE_SECONDS = int(os.environ.get("RECORDER_SESSION_IDLE", 30 * 60))
+STATE_SAMPLE_SECONDS = 30  # session 狀態大小多久重估一次 (伺服器 session 一覽用)
+
+# 背景匯出的 worker 數 (全程序共用)，與匯出進行中時介面更新進度的間隔
+EXPORT_WORKERS = int(os.environ.get("RECORDER_EXPORT_WORKERS", 2))
+EXPORT_POLL_SECONDS = 1
+
+@st.cache_resource
+def get_roster():
+    return load_roster(ROSTER_PATH, ROSTER_TEAM)
+
+@st.cache_resource
+def get_journal():
+    return EventJournal(JOURNAL_PATH)
+
+@st.cache_resource
+def get_season():
+    return SeasonStore(SEASON_PATH)
+
+roster = get_roster()
+journal = get_journal()
+season = get_season()
 
 # ==========================================
 # 2. Session State 初始化
 # ==========================================
-if 'logs' not in st.session_state: st.session_state.logs = []
-if 'my_score' not in st.session_state: st.session_state.my_score = 0
-if 'enemy_score' not in st.session_state: st.session_state.enemy_score = 0
 if 'current_player' not in st.session_state: st.session_state.current_player = None 
 if 'confirm_reset' not in st.session_state: st.session_state.confirm_reset = False
 if 'radio_reset_id' not in st.session_state: st.session_state.radio_reset_id = 0
 
-if 'game_meta' not in st.session_state:
-    st.session_state.game_meta = {"match_name": "校內聯賽", "date": datetime.now().date(), "opponent": "對手", "set": 1}
-
-if 'active_lineup' not in st.session_state:
-    st.session_state.active_lineup = [f"{p['背號']} - {p['姓名']} ({p['位置']})" for p in ROSTER_DB[:7]]
-
-if 'seen_players' not in st.session_state:
-    initial_players = []
-    for p_str in st.session_state.active_lineup:
-        try:
-            short = p_str.split(" - ")[0]
-            initial_players.append(short)
-        except: pass
-    st.session_state.seen_players = initial_players
+# 比賽紀錄、比賽資訊與陣容放在整個伺服器共用的 hub (所有記分端 / 觀看端看同一場)，
+# 從日誌還原只在 hub 建立時做一次
+@st.cache_resource
+def get_hub():
+    meta = {"match_name": "校內聯賽", "date": datetime.now().date(), "opponent": "對手", "set": 1}
+    saved_logs, saved_meta = journal.load()
+    if saved_meta: meta = {**saved_meta, 'date': date.fromisoformat(saved_meta['date'])}
+    lineup = roster.labels[:7]
+    match = Match(roster, lineup)
+    for log in saved_logs: match.record_event(log)
+    return MatchHub(match, meta, lineup)
+
+hub = get_hub()
+
+@st.cache_resource
+def get_sessions():
+    return SessionRegistry()
+
+@st.cache_resource
+def get_export_pool():
+    return ExportPool(EXPORT_WORKERS)
+
+export_pool = get_export_pool()
+
+# 這個 session 的版本快取 (有預算上限)，登記到全程序的 session 一覽
+sessions = get_sessions()
+if 'session_cache' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex[:8]
+    st.session_state.session_cache = SessionCache(SESSION_BUDGET_KIB)
+    sessions.register(st.session_state.session_id, st.session_state.session_cache)
+session_cache = st.session_state.session_cache
+session_cache.touch()  # 只在整頁重跑與按鍵時算使用；定時更新的 fragment 不會讓 session 一直不閒置
+sessions.trim_idle(SESSION_IDLE_SECONDS)
+
+# 效能紀錄 (常駐，只是 append)；網址加上 ?diag=1 才顯示診斷面板
+if 'perf' not in st.session_state: st.session_state.perf = PerfLog()
+perf = st.session_state.perf
+# 排入的匯出工作 key -> (效能紀錄名稱, 事件數)；worker 不碰 PerfLog，介面看到工作結束時才記一筆
+if 'export_timing' not in st.session_state: st.session_state.export_timing = {}
+SHOW_DIAG = st.query_params.get("diag") == "1"
+if st.session_state.pop("profile_next", False):
+    st.session_state.profiler = RerunProfiler()
+    st.session_state.profiler.start()
 
 # ==========================================
 # 3. 核心邏輯
 # ==========================================
 
-def update_seen_players(player_str):
-    if "對手" in player_str: return
-    try:
-        short = player_str.split(" - ")[0]
-        if short not in st.session_state.seen_players:
-            st.session_state.seen_players.append(short)
-    except: pass
-
-def recalculate_scores():
-    temp_my = 0
-    temp_opp = 0
-    chronological_logs = st.session_state.logs[::-1]
-    
-    for log in chronological_logs:
-        raw_action = log.get("原始動作", log.get("動作", ""))
-        update_seen_players(log["球員"])
-        
-        effect = ACTION_EFFECTS.get(raw_action, 0)
-        if "對手" in raw_action and raw_action in ACTION_EFFECTS: effect = 1
+def apply_editor_delta(key, version):
+    """紀錄明細 data_editor 的 on_change：只套用被編輯 / 新增 / 刪除的列"""
+    with hub.lock:
+        match = hub.match
+        if match.version != version:  # 表格顯示之後別的記分端已經改過紀錄，列位置對不上
+            st.toast("⚠️ 紀錄已被更新，請重新編輯", icon="⚠️")
+            return
+        with perf.timed("editor_rescore", len(match)):
+            start = match.apply_editor_delta(st.session_state[key])
+        if start is not None:
+            journal.replace(start, match.events.records(start))
+            st.session_state.log_edited = True
+
+def set_lineup_slot(i, key):
+    """換人選單的 on_change：只有使用者改選時才寫回共用的陣容"""
+    with hub.lock:
+        hub.lineup[i] = st.session_state[key]
+        hub.lineup_version += 1
+        hub.match.set_lineup(hub.lineup)
+
+def select_player(player_str):
+    """點選球員 (再點一次取消)；用 callback 更新，按鍵後不需要另外 st.rerun()"""
+    st.session_state.current_player = None if st.session_state.current_player == player_str else player_str
+
+def timed(name, build):
+    """包一層效能紀錄 (session 快取重建時用)"""
+    def run():
+        with perf.timed(name, len(hub.match)):
+            return build()
+    return run
+
+def queue_export(kind):
+    """
+    排入背景匯出 (kind: "set" 本局 / "match" 整場)。持鎖時只複製目前這局 (Match.copy，毫秒級)，
+    活頁簿在 worker 裡寫，已結束的局寫到時才從賽季資料庫載入；按鍵不必等匯出。
+    同一版本的同一種匯出已經在做或做好了就直接沿用。
+    """
+    with hub.lock:
+        meta, live_set = dict(hub.meta), hub.live_set
+        key = (kind, hub.match.version, live_set, meta['match_name'], str(meta['date']), meta['opponent'])
+        snapshot = hub.match.copy()
+    if kind == "set":
+        set_nos, label, file_name = [live_set], f"G{live_set}", f"{meta['match_name']}_G{live_set}.xlsx"
+    else:
+        set_nos = sorted(set(season.match_sets(meta)) | {live_set})
+        label, file_name = f"整場 ({len(set_nos)} 局)", f"{meta['match_name']}.xlsx"
+    order = {n: k for k, n in enumerate(set_nos)}
+
+    def build(report):
+        # 在 worker 執行緒執行，不能用 st.* 或 hub，只用上面抓好的物件
+        def sets():
+            for set_no in set_nos:
+                yield set_no, snapshot if set_no == live_set else season.load_set(meta, set_no, roster=roster)
+        return build_workbook(sets(), progress=lambda n, done, total: report((order[n] + done / max(total, 1)) / len(set_nos)))
+
+    job = export_pool.submit(key, build, label, file_name)
+    if job.pending: st.session_state.export_timing.setdefault(key, (f"export_{kind}", len(snapshot)))
+    st.session_state.export_queued = True
+
+def score_html(match):
+    rotation, server = match.rallies.current
+    serving = {1: "我方發球", -1: "對手發球"}.get(server, "")
+    return (
+        f"<div class='big-score'>"
+        f"<span style='color:#0d6efd'>{match.my_score}</span>"
+        f"<span class='score-sep'> : </span>"
+        f"<span style='color:#dc3545'>{match.opp_score}</span>"
+        f"</div>"
+        f"<div class='pos-label'>R{rotation} {serving}</div>"
+    )
 
-        res_str = "繼續"
-        score_str = ""
-        
-        if effect == 1:
-            temp_my += 1
-            res_str = "得分"
-            score_str = f"{temp_my}:{temp_opp}"
-        elif effect == -1:
-            temp_opp += 1
-            res_str = "失誤"
-            score_str = f"{temp_my}:{temp_opp}"
-            
-        log["結果"] = res_str
-        log["比分"] = score_str
-        
-        stats_name = ACTION_MAP.get(raw_action, raw_action)
-        if "對手" in raw_action and raw_action not in ["對手接噴"]:
-            stats_name = "對手失誤(總計)"
-        
-        log["動作"] = stats_name
+def render_viewer(match, meta):
+    """
+    觀看端的內容 (HTML 字串)：hub 每個紀錄版本只呼叫一次，所有觀看端共用；
+    直接由統計矩陣組表格，不經過 DataFrame / Styler。
+    """
+    return {
+        "header": f"**{meta['match_name']}** | {meta['date']} | 🆚 **{meta['opponent']}** (Set {meta['set']})",
+        "score": score_html(match),
+        "stats": stats_html(*match.stats.table(match.seen_players), hide_empty=True),
+    }
+
+def metrics_frame(table):
+    """效率指標 (指標名, 欄名, 數值) -> DataFrame"""
+    rows, cols, values = table
+    frame = pd.DataFrame(values, index=rows, columns=cols)
+    frame.index.name = "指標"
+    return frame
 
-    st.session_state.logs = chronological_logs[::-1]
-    st.session_state.my_score = temp_my
-    st.session_state.enemy_score = temp_opp
+def cached_by_version(name, build):
+    """以紀錄版本為鍵的 session 快取：紀錄沒變動就沿用上次的結果 (超過 session 預算時會被丟掉重建)"""
+    with hub.lock:
+        return session_cache.get(name, hub.match.version, timed(f"build_{name}", build))
 
 def log_event(action_key):
     player = st.session_state.current_player
@@ -231,30 +298,79 @@ def log_event(action_key):
         st.toast("⚠️ 請先選擇一位球員！", icon="⚠️")
         return 
 
-    if player: update_seen_players(player)
+    session_cache.touch()  # 按鍵只重跑記分的 fragment，不經過頂端的 touch
+    t0 = time.perf_counter()
+    with hub.lock:
+        match = hub.match
+        if player: match.see_player(player)
+        match.log(action_key, player, context=player)
+        journal.append(match.events.record(len(match) - 1))
+    st.session_state.current_player = None
+    st.session_state.radio_reset_id += 1 
+    perf.add("log_event", time.perf_counter() - t0, len(match))
+
+def undo_redo(action):
+    """復原 / 重做：只 patch 尾端的事件；復原按鍵時把當時選中的球員選回來"""
+    session_cache.touch()
+    with hub.lock, perf.timed(action, len(hub.match)):
+        match = hub.match
+        result = match.undo() if action == "undo" else match.redo()
+        if result is None: return
+        start, context = result
+        journal.replace(start, match.events.records(start))
+    st.session_state.current_player = context if action == "undo" else None
+
+def set_video_anchor():
+    """影片對時：目前這局的第 N 筆紀錄 (0 = 現在) 在影片的哪個時間；存在比賽資訊裡，跟著日誌還原"""
+    seconds = parse_video_time(st.session_state.video_at)
+    if seconds is None:
+        st.toast("⚠️ 影片時間格式不對 (hh:mm:ss)", icon="⚠️")
+        return
+    with hub.lock:
+        n = st.session_state.video_event
+        anchor = anchor_at(hub.match, seconds, n - 1 if n else None)
+        hub.meta['video'] = {**hub.meta.get('video', {}), str(hub.live_set): list(anchor)}
+
+def save_live_set():
+    """
+    目前這局存入賽季，用的是記錄時的比賽資訊 (hub.meta 只在換局時才換)；
+    存過 / 載入之後沒變動就不存，重置後空白的局不會蓋掉存過的紀錄。
+    """
+    with hub.lock:
+        if hub.match.version != hub.saved_version:
+            season.save_set(hub.meta, hub.live_set, hub.match)
+            hub.saved_version = hub.match.version
 
-    stats_name = ACTION_MAP.get(action_key, action_key)
-    if is_opponent_action and action_key not in ["對手接噴"]: 
-        stats_name = "對手失誤(總計)"
-        final_player = "對手"
-    else:
-        final_player = player
+def switch_set(new_meta):
+    """
+    換局 / 換場 (比賽名稱、日期、對手或局數變了)：目前這局先以原本的比賽資訊存入賽季，
+    再換成新的比賽資訊並載入那一局 (存過就接著紀錄，沒存過是空的)
+    """
+    with hub.lock:
+        save_live_set()
+        if any(new_meta[k] != hub.meta[k] for k in ("match_name", "date", "opponent")):
+            hub.meta.pop('video', None)  # 影片對時點屬於原本那場
+        hub.meta.update(new_meta)
+        match = season.load_set(hub.meta, new_meta['set'], lineup=hub.lineup, roster=roster)
+        hub.replace(match, new_meta['set'])
+        journal.replace(0, match.events.records())
+    st.session_state.current_player = None
 
-    if is_opponent_action: st.session_state.current_player = None
+# --- 觀看端 (唯讀)：只顯示 hub 共用的 snapshot，不建立任何記分用的元件 ---
+VIEW_MODE = st.query_params.get("view")
+session_cache.label = {"1": "觀看端", "score": "計分板"}.get(VIEW_MODE, "記分端")
 
-    new_record = {
-        "時間": datetime.now().strftime("%H:%M:%S"),
-        "球員": final_player, 
-        "動作": stats_name,
-        "原始動作": action_key,
-        "結果": "",
-        "比分": "",
-    }
-    
-    st.session_state.logs.insert(0, new_record)
-    recalculate_scores()
-    st.session_state.current_player = None
-    st.session_state.radio_reset_id += 1 
+@st.fragment(run_every=VIEWER_REFRESH_SECONDS)
+def viewer_panel():
+    view = hub.snapshot(render_viewer)
+    st.markdown(view["header"])
+    st.markdown(view["score"], unsafe_allow_html=True)
+    if VIEW_MODE != "score":
+        st.markdown(view["stats"], unsafe_allow_html=True)
+
+if VIEW_MODE in ("1", "score"):
+    viewer_panel()
+    st.stop()
 
 # ==========================================
 # 4. 介面佈局
@@ -265,20 +381,12 @@ def log_event(action_key):
 c_meta, c_score, c_btn = st.columns([3, 2, 1], gap="small")
 
 with c_meta:
-    meta = st.session_state.game_meta
+    meta = hub.meta
     st.markdown(f"**{meta['match_name']}** | {meta['date']}")
     st.markdown(f"🆚 **{meta['opponent']}** (Set {meta['set']})")
 
 with c_score:
-    # 緊湊比分顯示
-    st.markdown(
-        f"<div class='big-score'>"
-        f"<span style='color:#0d6efd'>{st.session_state.my_score}</span>"
-        f"<span class='score-sep'> : </span>"
-        f"<span style='color:#dc3545'>{st.session_state.enemy_score}</span>"
-        f"</div>", 
-        unsafe_allow_html=True
-    )
+    score_slot = st.empty()  # 由下方操作區的 fragment 填入比分
 
 with c_btn:
     if st.button("🔄 重置", type="secondary", use_container_width=True):
@@ -287,17 +395,15 @@ with c_btn:
 # 確認重置視窗
 if st.session_state.confirm_reset:
     with st.chat_message("assistant"):
-        st.warning("⚠️ 確定清空資料？")
+        st.warning("⚠️ 確定清空資料？(目前這局會先存入賽季)")
         cols = st.columns(2)
         if cols[0].button("✅ 是"):
-            st.session_state.logs = []
-            st.session_state.my_score = 0
-            st.session_state.enemy_score = 0
+            with hub.lock:
+                save_live_set()
+                hub.replace(Match(roster, hub.lineup))
+                journal.reset()
+                hub.journaled_meta = {}
             st.session_state.current_player = None
-            st.session_state.seen_players = []
-            for p_str in st.session_state.active_lineup:
-                try: st.session_state.seen_players.append(p_str.split(" - ")[0])
-                except: pass
             st.session_state.confirm_reset = False
             st.rerun()
         if cols[1].button("❌ 否"):
@@ -306,52 +412,33 @@ if st.session_state.confirm_reset:
 
 # --- 設定區 (摺疊) ---
 with st.expander("⚙️ 比賽資訊 / 換人設定"):
+    # 輸入值先不寫回 hub.meta：目前這局要以記錄時的比賽資訊存檔，由 switch_set 先存再換
     c0, c1, c2, c3 = st.columns(4)
-    st.session_state.game_meta['match_name'] = c0.text_input("比賽", value=st.session_state.game_meta['match_name'])
-    st.session_state.game_meta['date'] = c1.date_input("日期", value=st.session_state.game_meta['date'])
-    st.session_state.game_meta['opponent'] = c2.text_input("對手", value=st.session_state.game_meta['opponent'])
-    st.session_state.game_meta['set'] = c3.number_input("局", min_value=1, value=st.session_state.game_meta['set'])
+    new_meta = {
+        'match_name': c0.text_input("比賽", value=hub.meta['match_name']),
+        'date': c1.date_input("日期", value=hub.meta['date']),
+        'opponent': c2.text_input("對手", value=hub.meta['opponent']),
+        'set': c3.number_input("局", min_value=1, value=hub.meta['set']),
+    }
     
     st.markdown("---")
-    roster_options = [f"{p['背號']} - {p['姓名']} ({p['位置']})" for p in ROSTER_DB]
-    cols_lineup = st.columns(7)
-    for i in range(7):
+    # 先發最多 7 人 (6 + 自由球員)，名單不足 7 人時有幾人就列幾格。
+    # 選單的值只在 on_change 寫回 hub；key 帶陣容版本，別的記分端換人後這裡的選單會以新陣容重建
+    cols_lineup = st.columns(len(hub.lineup))
+    for i in range(len(hub.lineup)):
         with cols_lineup[i]:
-            def_idx = roster_options.index(st.session_state.active_lineup[i]) if st.session_state.active_lineup[i] in roster_options else 0
-            new_val = st.selectbox(f"Pos {i+1}", roster_options, index=def_idx, key=f"pos_{i}", label_visibility="collapsed")
-            if new_val != st.session_state.active_lineup[i]:
-                st.session_state.active_lineup[i] = new_val
-                update_seen_players(new_val)
+            key = f"pos_{i}_{hub.lineup_version}"
+            st.selectbox(f"Pos {i+1}", roster.labels, index=roster.index.get(hub.lineup[i], 0), key=key,
+                         label_visibility="collapsed", on_change=set_lineup_slot, args=(i, key))
 
-# --- 主操作區 ---
-# 1. 球員選擇
-p_cols = st.columns(7)
-for idx, player_str in enumerate(st.session_state.active_lineup):
-    try:
-        parts = player_str.split(" - ")
-        num = parts[0]
-        name = parts[1].split(" (")[0]
-        pos = parts[1].split(" (")[1].replace(")", "")
-    except:
-        num, name, pos = "?", "?", "?"
-
-    is_selected = (st.session_state.current_player == player_str)
-    with p_cols[idx]:
-        st.markdown(f"<div class='pos-label'>{pos}</div>", unsafe_allow_html=True)
-        if st.button(f"{num}\n{name}", key=f"btn_p_{idx}", type="primary" if is_selected else "secondary", use_container_width=True):
-            st.session_state.current_player = None if is_selected else player_str
-            st.rerun()
+if any(v != hub.meta[k] for k, v in new_meta.items()):
+    switch_set(new_meta)
 
-st.write("") # Spacer
-
-# 2. 動作紀錄區
-action_mode = st.radio(
-    "Mode", ["🔵 繼續", "🟢 得分", "🔴 失誤"], 
-    horizontal=True, 
-    key=f"radio_{st.session_state.radio_reset_id}",
-    label_visibility="collapsed"
-)
+if hub.meta != hub.journaled_meta:
+    journal.set_meta({**hub.meta, 'date': hub.meta['date'].isoformat()})
+    hub.journaled_meta = dict(hub.meta)
 
+# --- 主操作區 ---
 # [修正 4] 六欄排版 Helper
 def draw_action_grid(col_labels, btn_configs):
     """
@@ -372,88 +459,140 @@ def draw_action_grid(col_labels, btn_configs):
                 for label, key in buttons:
                     st.button(label, on_click=log_event, args=(key,), use_container_width=True)
 
-# 定義六大類標題
-grid_titles = ["發球", "攔網", "接發", "接球(防守)", "舉球", "攻擊"]
-
-if "繼續" in action_mode:
-    # 欄位對應: 0發球, 1攔網, 2接發, 3接球, 4舉球, 5攻擊
-    btns = [
-        [("發球", "發球")],                         # Col 0
-        [("攔網", "攔網")],                         # Col 1
-        [("接發A", "接發A"), ("接發B", "接發B")],   # Col 2
-        [("接球A", "接球A"), ("接球B", "接球B")],   # Col 3
-        [("舉球", "舉球"), ("舉好", "舉球好球")],    # Col 4
-        [("攻擊", "攻擊"), ("處理", "處理球")]       # Col 5
-    ]
-    draw_action_grid(grid_titles, btns)
-
-elif "得分" in action_mode:
-    # 得分頁面：接發/接球/舉球 通常沒有直接得分 (除非吊球算在攻擊)
-    btns = [
-        [("發球得分", "發球得分")],               # Col 0: 發球
-        [("攔網得分", "攔網得分")],               # Col 1: 攔網
-        [],                                     # Col 2: 接發 (空)
-        [],                                     # Col 3: 接球 (空)
-        [],                                     # Col 4: 舉球 (空)
-        [("攻擊得分", "攻擊得分"), ("吊球得分", "吊球得分"), 
-         ("打手得分", "打手得分"), ("送球得分", "送球得分"),
-         ("後排得分", "後排得分")]                # Col 5: 攻擊
-    ]
-    draw_action_grid(grid_titles, btns)
+# 比分、球員列與動作按鈕放在同一個 fragment：按鍵只重跑這一區，
+# 統計表、紀錄明細與匯出不會跟著重跑，按鍵回應不受紀錄筆數影響
+@st.fragment
+def scoring_panel():
+    with perf.timed("scoring_panel", len(hub.match)):
+        draw_scoring_panel()
+
+def draw_scoring_panel():
+    # 緊湊比分顯示 (下方為目前輪轉與發球方)
+    score_slot.markdown(score_html(hub.match), unsafe_allow_html=True)
+
+    # 復原 / 重做 (按錯時不用打開紀錄明細)
+    history = hub.match.history
+    u_cols = st.columns([1, 1, 5])
+    u_cols[0].button("↩️ 復原", key="btn_undo", on_click=undo_redo, args=("undo",), disabled=not history.can_undo, use_container_width=True)
+    u_cols[1].button("↪️ 重做", key="btn_redo", on_click=undo_redo, args=("redo",), disabled=not history.can_redo, use_container_width=True)
+
+    # 1. 球員選擇
+    p_cols = st.columns(7)
+    for idx, player_str in enumerate(hub.lineup):
+        player = roster.by_label.get(player_str)
+        num, name, pos = (player.number, player.name, player.position) if player else ("?", "?", "?")
+
+        is_selected = (st.session_state.current_player == player_str)
+        with p_cols[idx]:
+            st.markdown(f"<div class='pos-label'>{pos}</div>", unsafe_allow_html=True)
+            st.button(f"{num}\n{name}", key=f"btn_p_{idx}", type="primary" if is_selected else "secondary", use_container_width=True,
+                      on_click=select_player, args=(player_str,))
+
+    st.write("") # Spacer
+
+    # 2. 動作紀錄區
+    action_mode = st.radio(
+        "Mode", ["🔵 繼續", "🟢 得分", "🔴 失誤"], 
+        horizontal=True, 
+        key=f"radio_{st.session_state.radio_reset_id}",
+        label_visibility="collapsed"
+    )
+
+    # 定義六大類標題
+    grid_titles = ["發球", "攔網", "接發", "接球(防守)", "舉球", "攻擊"]
+
+    if "繼續" in action_mode:
+        # 欄位對應: 0發球, 1攔網, 2接發, 3接球, 4舉球, 5攻擊
+        btns = [
+            [("發球", "發球")],                         # Col 0
+            [("攔網", "攔網")],                         # Col 1
+            [("接發A", "接發A"), ("接發B", "接發B")],   # Col 2
+            [("接球A", "接球A"), ("接球B", "接球B")],   # Col 3
+            [("舉球", "舉球"), ("舉好", "舉球好球")],    # Col 4
+            [("攻擊", "攻擊"), ("處理", "處理球")]       # Col 5
+        ]
+        draw_action_grid(grid_titles, btns)
+
+    elif "得分" in action_mode:
+        # 得分頁面：接發/接球/舉球 通常沒有直接得分 (除非吊球算在攻擊)
+        btns = [
+            [("發球得分", "發球得分")],               # Col 0: 發球
+            [("攔網得分", "攔網得分")],               # Col 1: 攔網
+            [],                                     # Col 2: 接發 (空)
+            [],                                     # Col 3: 接球 (空)
+            [],                                     # Col 4: 舉球 (空)
+            [("攻擊得分", "攻擊得分"), ("吊球得分", "吊球得分"), 
+             ("打手得分", "打手得分"), ("送球得分", "送球得分"),
+             ("後排得分", "後排得分")]                # Col 5: 攻擊
+        ]
+        draw_action_grid(grid_titles, btns)
     
-    st.markdown("---")
-    st.caption("🔻 對手失誤 (我方得分)")
-    # 對手失誤區 (獨立寬欄)
-    oc1, oc2, oc3, oc4 = st.columns(4)
-    opps = ["對手發球出界", "對手發球掛網", "對手攻擊出界", "對手攻擊掛網", "對手送球失誤", "對手舉球失誤", "對手攔網犯規"]
-    for i, o in enumerate(opps):
-        with [oc1, oc2, oc3, oc4][i % 4]:
-            st.button(o, on_click=log_event, args=(o,), use_container_width=True)
-
-elif "失誤" in action_mode:
-    btns = [
-        [("發球出界", "發球出界"), ("發球掛網", "發球掛網"), ("發球犯規", "發球犯規")], # Col 0
-        [("攔網觸網", "攔網觸網"), ("攔網失誤", "攔網失誤")],                         # Col 1
-        [("接發失誤", "接發失誤")],                                                # Col 2
-        [("防守失誤", "接球失誤"), ("防守犯規", "防守犯規"), ("站位失誤", "站位失誤")], # Col 3
-        [("舉球失誤", "舉球失誤"), ("連擊", "連擊")],                               # Col 4
-        [("攻擊出界", "攻擊出界"), ("攻擊掛網", "攻擊掛網"), 
-         ("攻擊被攔", "攻擊被攔"), ("攻擊犯規", "攻擊犯規"), ("送球失誤", "送球失誤")]  # Col 5
-    ]
-    draw_action_grid(grid_titles, btns)
-
-st.write("") 
+        st.markdown("---")
+        st.caption("🔻 對手失誤 (我方得分)")
+        # 對手失誤區 (獨立寬欄)
+        oc1, oc2, oc3, oc4 = st.columns(4)
+        opps = ["對手發球出界", "對手發球掛網", "對手攻擊出界", "對手攻擊掛網", "對手送球失誤", "對手舉球失誤", "對手攔網犯規"]
+        for i, o in enumerate(opps):
+            with [oc1, oc2, oc3, oc4][i % 4]:
+                st.button(o, on_click=log_event, args=(o,), use_container_width=True)
+
+    elif "失誤" in action_mode:
+        btns = [
+            [("發球出界", "發球出界"), ("發球掛網", "發球掛網"), ("發球犯規", "發球犯規")], # Col 0
+            [("攔網觸網", "攔網觸網"), ("攔網失誤", "攔網失誤")],                         # Col 1
+            [("接發失誤", "接發失誤")],                                                # Col 2
+            [("防守失誤", "接球失誤"), ("防守犯規", "防守犯規"), ("站位失誤", "站位失誤")], # Col 3
+            [("舉球失誤", "舉球失誤"), ("連擊", "連擊")],                               # Col 4
+            [("攻擊出界", "攻擊出界"), ("攻擊掛網", "攻擊掛網"), 
+             ("攻擊被攔", "攻擊被攔"), ("攻擊犯規", "攻擊犯規"), ("送球失誤", "送球失誤")]  # Col 5
+        ]
+        draw_action_grid(grid_titles, btns)
+
+    st.write("")
+
+scoring_panel()
 
 # --- [修正 2] 統計表摺疊區 ---
-with st.expander("📊 統計數據 & 紀錄明細", expanded=False):
-    
+# 統計區只在紀錄版本變動時重新計算；展開時每 STATS_REFRESH_SECONDS 秒檢查一次版本
+@st.fragment(run_every=STATS_REFRESH_SECONDS if st.session_state.get("stats_open") else None)
+def stats_panel():
+    if not st.session_state.get("stats_open"): return  # 收合時不產生任何內容
+    if st.session_state.pop("log_edited", False):
+        st.rerun()  # 紀錄明細改動會影響比分，整頁重跑一次
+    with perf.timed("stats_panel", len(hub.match)):
+        draw_stats_panel()
+
+def draw_stats_panel():
+
     # Tab 1: 紀錄明細
     st.subheader("📝 紀錄明細 (可編輯/刪除)")
-    if st.session_state.logs:
-        df_logs = pd.DataFrame(st.session_state.logs)
+    match = hub.match
+    if match:
+        df_logs = cached_by_version("df_logs", lambda: pd.DataFrame(match.events.records(newest_first=True)))  # 顯示時新的在上
         edit_actions = list(ACTION_EFFECTS.keys())
-        
-        edited_df = st.data_editor(
+    
+        # widget key 跟著紀錄版本走：紀錄一變動就換新 key，已套用的 delta 不會再套一次
+        editor_key = f"log_editor_{match.version}"
+        t0 = time.perf_counter()
+        st.data_editor(
             df_logs,
             column_config={
-                "球員": st.column_config.SelectboxColumn("球員", options=[f"{p['背號']} - {p['姓名']} ({p['位置']})" for p in ROSTER_DB] + ["對手"], required=True),
+                "球員": st.column_config.SelectboxColumn("球員", options=roster.options, required=True),
                 "原始動作": st.column_config.SelectboxColumn("動作修正", options=edit_actions, required=True), 
                 "動作": None, 
                 "結果": st.column_config.TextColumn("結果", disabled=True),
                 "比分": st.column_config.TextColumn("比分", disabled=True),
+                "時戳": None,
             },
             hide_index=True,
             use_container_width=True,
             height=300,
-            key="log_editor",
+            key=editor_key,
+            on_change=apply_editor_delta,
+            args=(editor_key, match.version),
             num_rows="dynamic"
         )
-        
-        new_logs = edited_df.to_dict('records')
-        if new_logs != st.session_state.logs:
-            st.session_state.logs = new_logs
-            recalculate_scores()
-            st.rerun()
+        perf.add("data_editor", time.perf_counter() - t0, len(match))
     else:
         st.info("尚無紀錄")
 
@@ -461,75 +600,135 @@ with st.expander("📊 統計數據 & 紀錄明細", expanded=False):
 
     # Tab 2: 統計表
     st.subheader("📈 數據統計")
-    if st.session_state.logs:
-        df = pd.DataFrame(st.session_state.logs)
-        
-        def get_short_name(p_str):
-            if "對手" in p_str: return "對手"
-            return p_str.split(" - ")[0]
-        
-        df['ShortName'] = df['球員'].apply(get_short_name)
-        stats = df.pivot_table(index='動作', columns='ShortName', aggfunc='size', fill_value=0)
-        
-        ordered_cols = []
-        for p in st.session_state.seen_players:
-            ordered_cols.append(p)
-            if p not in stats.columns: stats[p] = 0
-        
-        final_cols = [c for c in ordered_cols]
-        stats["Total"] = stats[[c for c in final_cols if c in stats.columns]].sum(axis=1)
-        final_cols.append("Total")
-        if "對手" in stats.columns: final_cols.append("對手")
-            
-        stats = stats.reindex(columns=final_cols, fill_value=0)
-        stats = stats.reindex(ORDERED_ROWS, fill_value=0)
-        
-        # [修正 3] 計算個人總得分/總失誤
-        # 篩選得分列 (Score Rows)
-        score_mask = stats.index.isin(SCORE_ROWS_LIST)
-        stats.loc["個人得分總和"] = stats[score_mask].sum()
-        
-        # 篩選失誤列 (Error Rows)
-        error_mask = stats.index.isin(ERROR_ROWS_LIST)
-        stats.loc["個人失分總和"] = stats[error_mask].sum()
-        
-        # 鋪色
-        def color_rows(row):
-            idx = row.name
-            color = ''
-            if idx in ["個人得分總和", "個人失分總和"]:
-                color = 'background-color: #cfe2f3; color: black; font-weight: bold' # 藍色加總
-            elif "繼續" in idx:
-                color = 'background-color: #FFF2CC; color: black'
-            elif "得分" in idx or "對手" in idx:
-                color = 'background-color: #D9EAD3; color: black'
-            elif "失誤" in idx or "出界" in idx or "掛網" in idx or "犯規" in idx or "被攔" in idx:
-                color = 'background-color: #F4CCCC; color: black'
-            return [color] * len(row)
-
-        st.dataframe(stats.style.apply(color_rows, axis=1), use_container_width=True, height=800)
-        
-        # Excel
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-            sheet_name = f"G{st.session_state.game_meta['set']}_Stats"
-            stats.to_excel(writer, sheet_name=sheet_name)
-            wb = writer.book
-            ws = writer.sheets[sheet_name]
-            
-            fmt_y = wb.add_format({'bg_color': '#FFF2CC', 'border': 1})
-            fmt_g = wb.add_format({'bg_color': '#D9EAD3', 'border': 1})
-            fmt_r = wb.add_format({'bg_color': '#F4CCCC', 'border': 1})
-            fmt_b = wb.add_format({'bg_color': '#CFE2F3', 'border': 1, 'bold': True})
-            
-            for idx, row_name in enumerate(stats.index):
-                row_num = idx + 1
-                if row_name in ["個人得分總和", "個人失分總和"]: ws.set_row(row_num, None, fmt_b)
-                elif "繼續" in row_name: ws.set_row(row_num, None, fmt_y)
-                elif "得分" in row_name or "對手" in row_name: ws.set_row(row_num, None, fmt_g)
-                elif "失誤" in row_name or "出界" in row_name: ws.set_row(row_num, None, fmt_r)
-            
-            df_logs.to_excel(writer, sheet_name="Logs", index=False)
-            
-        fname = f"{st.session_state.game_meta['match_name']}_G{st.session_state.game_meta['set']}.xlsx"
-        st.download_button("📥 下載 Excel", data=buffer.getvalue(), file_name=fname)
\ No newline at end of file
+    if match:
+        # 鋪色的 HTML 表格以紀錄版本快取：紀錄沒變動時直接送出同一份字串，不重建表格、也不經過 Styler
+        table = cached_by_version("stats_html", lambda: stats_html(*match.stats.table(match.seen_players)))
+        with perf.timed("stats_render", len(match)):
+            st.markdown(f"<div style='max-height:800px; overflow:auto'>{table}</div>", unsafe_allow_html=True)
+    
+        # 效率指標 (攻擊效率、接發、發球、Sideout)
+        st.subheader("🎯 效率指標")
+        metrics = cached_by_version("metrics", lambda: metrics_frame(match_metrics(match)))
+        st.dataframe(metrics, use_container_width=True)
+
+        # 各輪轉得失分 (回合索引)
+        st.subheader("🔄 輪轉")
+        rotations = cached_by_version("rotations", lambda: pd.DataFrame(
+            match.rallies.rotation_table(), columns=["輪轉", "回合", "得分", "失分", "接發球回合", "Sideout", "發球回合", "Break"]
+        ).set_index("輪轉"))
+        st.dataframe(rotations, use_container_width=True)
+
+# Excel 匯出：排進背景 worker，這一區只顯示進度與做好的檔案；
+# 統計區打開且有工作在做時每 EXPORT_POLL_SECONDS 秒更新一次，全部做完或收合就停
+st.session_state.export_polling = bool(st.session_state.get("stats_open")) and export_pool.pending()
+
+@st.fragment(run_every=EXPORT_POLL_SECONDS if st.session_state.export_polling else None)
+def export_panel():
+    if st.session_state.pop("export_queued", False) or (st.session_state.export_polling and not export_pool.pending()):
+        st.rerun()  # 開始 / 停止輪詢要整頁重跑才會換 run_every
+    if not st.session_state.get("stats_open"): return
+    st.subheader("📥 匯出")
+    x1, x2 = st.columns(2)
+    x1.button("📥 產生本局 Excel", on_click=queue_export, args=("set",), use_container_width=True)
+    x2.button("📥 產生整場 Excel (所有局)", on_click=queue_export, args=("match",), use_container_width=True)
+    for k, job in enumerate(export_pool.jobs()):
+        timing = None if job.pending else st.session_state.export_timing.pop(job.key, None)
+        if timing and job.status == "done":
+            perf.add(timing[0], job.finished - job.submitted, timing[1])  # 排隊到做好，也就是使用者等的時間
+        j1, j2 = st.columns([3, 1])
+        if job.pending:
+            j1.progress(job.progress, text=f"{job.label} 產生中…")
+        elif job.status == "done":
+            j1.caption(f"{job.label} | {len(job.data) / 1024:.0f} KiB | {job.finished - job.submitted:.1f} s")
+            j2.download_button("下載", data=job.data, file_name=job.file_name, mime=XLSX_MIME, key=f"export_dl_{k}", use_container_width=True)
+        else:
+            j1.error(f"{job.label} 匯出失敗：{job.error}")
+
+with st.expander("📊 統計數據 & 紀錄明細", expanded=False, key="stats_open", on_change="rerun"):
+    stats_panel()
+    export_panel()
+
+# --- 影片對時 / 剪輯清單 ---
+with st.expander("🎬 影片對時 / 剪輯清單", expanded=False, key="video_open", on_change="rerun"):
+    if st.session_state.get("video_open"):
+        match = hub.match
+        v1, v2, v3 = st.columns([2, 2, 1])
+        v1.text_input("影片時間 (hh:mm:ss)", value="00:00:00", key="video_at")
+        v2.number_input("對上第幾筆紀錄 (0 = 現在，開始錄影時按)", min_value=0, max_value=len(match), value=0, key="video_event")
+        v3.button("🎯 對時", on_click=set_video_anchor, use_container_width=True)
+        anchor = hub.meta.get('video', {}).get(str(hub.live_set))
+        if not anchor:
+            st.info("這局還沒對時")
+        else:
+            st.caption(f"對時點：影片 {video_clock(anchor[1])}")
+            c1, c2, c3, c4 = st.columns(4)
+            clip_rows = c1.multiselect("項目", STATS_ROWS)
+            clip_players = c2.multiselect("球員", roster.numbers + ["對手"])
+            clip_from, clip_to = (c.text_input(label, placeholder="hh:mm:ss") for c, label in ((c3, "影片從"), (c4, "影片到")))
+            clip_from = parse_video_time(clip_from) if clip_from else None
+            clip_to = parse_video_time(clip_to) if clip_to else None
+            clips = clip_list(match, anchor, rows=clip_rows or None, players=clip_players or None, start=clip_from, end=clip_to)
+            st.dataframe(pd.DataFrame([
+                {**clip, "影片開始": video_clock(clip["影片開始"]), "影片結束": video_clock(clip["影片結束"])} for clip in clips
+            ]), hide_index=True, use_container_width=True)
+            base = f"{hub.meta['match_name']}_G{hub.live_set}_clips"
+            e1, e2 = st.columns(2)
+            e1.download_button("📥 剪輯清單 CSV", data=clips_csv(clips), file_name=f"{base}.csv", mime="text/csv")
+            e2.download_button("📥 EDL", data=clips_edl(clips, base), file_name=f"{base}.edl", mime="text/plain")
+
+# --- 賽季統計 (跨場次 / 跨局) ---
+with st.expander("🗂️ 賽季統計", expanded=False, key="season_open", on_change="rerun"):
+    if st.session_state.get("season_open"):
+        if st.button("💾 目前這局存入賽季"):
+            save_live_set()
+            st.toast("已存入賽季")
+        f1, f2, f3 = st.columns(3)
+        opponent = f1.selectbox("對手", ["全部"] + season.opponents())
+        player = f2.selectbox("球員", ["全部"] + roster.numbers + ["對手"])
+        row = f3.selectbox("項目", ["全部"] + STATS_ROWS)
+        filters = {k: v for k, v in (("opponent", opponent), ("player", player), ("row", row)) if v != "全部"}
+        with perf.timed("season_query"):
+            if "row" in filters:
+                st.metric(f"{player if player != '全部' else '全隊'} {row}", season.count(**filters))
+            rows, cols, values = season.table(**{k: v for k, v in filters.items() if k != "row"})
+            season_metrics = season.metrics(**{k: v for k, v in filters.items() if k != "row"})
+        st.dataframe(metrics_frame(season_metrics), use_container_width=True)
+        st.dataframe(pd.DataFrame(values, index=rows, columns=cols), use_container_width=True, height=400)
+        st.caption(f"已存 {len(season.sets())} 局")
+
+# ==========================================
+# 5. 效能診斷 (?diag=1)
+# ==========================================
+# 面板本身不算進 rerun 時間
+profiler = st.session_state.pop("profiler", None)
+if profiler: st.session_state.profile_report = profiler.stop()
+perf.add("rerun", time.perf_counter() - RERUN_STARTED, len(hub.match),
+         approx_size_kib([*st.session_state.values(), hub.match]) if SHOW_DIAG else None)
+
+# 快取以外的 session 狀態大小 (效能紀錄等)，定期重估給伺服器 session 一覽用
+if time.time() - st.session_state.get("state_sampled", 0) > STATE_SAMPLE_SECONDS:
+    session_cache.state_kib = approx_size_kib(v for k, v in st.session_state.items() if k != "session_cache")
+    st.session_state.state_sampled = time.time()
+
+if SHOW_DIAG:
+    with st.expander("🩺 效能診斷", expanded=True):
+        st.dataframe(pd.DataFrame(perf.summary()), hide_index=True, use_container_width=True)
+        st.caption(f"紀錄 {len(hub.match)} 筆 | session 約 {approx_size_kib([*st.session_state.values(), hub.match]):.1f} KiB | 樣本 {len(perf.samples)} 筆")
+        d1, d2, d3 = st.columns(3)
+        d1.download_button("CSV", data=perf.to_csv, file_name="perf.csv", mime="text/csv")
+        d2.download_button("JSON", data=perf.to_json, file_name="perf.json", mime="application/json")
+        d3.button("cProfile 下一次 rerun", on_click=lambda: st.session_state.update(profile_next=True))
+        if st.session_state.get("profile_report"):
+            st.code(st.session_state.profile_report, language=None)
+
+    # 伺服器上所有 session 的記憶體 (比賽紀錄在 hub，全程序一份)
+    with st.expander("🖥️ 伺服器 sessions", expanded=False):
+        st.caption(
+            f"比賽紀錄 (共用) {approx_size_kib([hub.match]):.1f} KiB | 匯出檔 (共用) {export_pool.nbytes() / 1024:.1f} KiB | "
+            f"每個 session 快取上限 {SESSION_BUDGET_KIB} KiB | "
+            f"閒置 {SESSION_IDLE_SECONDS // 60} 分鐘清除快取 | 本 session {st.session_state.session_id}"
+        )
+        st.dataframe(pd.DataFrame(sessions.rows()), hide_index=True, use_container_width=True)
+        if st.button("🧹 清掉其他 session 的快取"):
+            freed = sum(c.clear() for k, c in sessions.caches() if k != st.session_state.session_id)
+            st.toast(f"已釋放 {freed:.1f} KiB")
@@ -0,0 +1 @@
+"""紀錄系統熱路徑的效能量測 (python -m benchmarks.bench_recorder)"""
@@ -0,0 +1,253 @@
+"""
+紀錄系統熱路徑效能量測
+
+    python -m benchmarks.bench_recorder                          # 預設規模: 1 局 ~ 10 萬筆
+    python -m benchmarks.bench_recorder --sizes 60,1000 --out run.json
+    python -m benchmarks.bench_recorder --compare baseline.json  # 與先前結果比較
+
+各階段分開量測：按鍵 (log_event)、整段重算 (recalculate_scores)、
+紀錄明細編輯後的重算、統計表產生、鋪色統計表的繪製 (重建 / 快取沿用)、效率指標、Excel 匯出。
+延遲取百分位數，記憶體高峰另外以 tracemalloc 跑一次量測 (避免干擾計時)。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from recorder import Match, EventJournal, build_excel, match_metrics, stats_html
+from recorder.perf import percentile
+
+from .synth import synth_events, OUR_POINTS, OUR_ERRORS
+
+# 一局約 60 ~ 150 筆；10 萬筆約一整個球季
+DEFAULT_SIZES = [120, 1_000, 10_000, 100_000]
+PERCENTILES = (50, 90, 99)
+
+
+def summarize(samples_ns):
+    values = sorted(samples_ns)
+    summary = {"n": len(values), "mean_us": sum(values) / len(values) / 1000, "max_us": values[-1] / 1000}
+    for pct in PERCENTILES:
+        summary[f"p{pct}_us"] = percentile(values, pct) / 1000
+    return summary
+
+
+def peak_memory_kib(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def build_match(events):
+    match = Match()
+    for seconds, player, action in events:
+        match.log(action, player, seconds)
+    return match
+
+
+# ---------- 各階段 ----------
+
+def stage_log_event(events, journal):
+    """每筆按鍵: Match.log + 組出日誌紀錄並放進日誌佇列"""
+    match = Match()
+    samples = []
+    clock = time.perf_counter_ns
+    for seconds, player, action in events:
+        t0 = clock()
+        match.log(action, player, seconds)
+        journal.append(match.events.record(len(match) - 1))
+        samples.append(clock() - t0)
+    return samples
+
+
+def stage_recalculate(match, reps):
+    """從第 0 筆整段重算"""
+    keys = [match.events.key(i) for i in range(len(match))]
+    samples = []
+    for _ in range(reps):
+        t0 = time.perf_counter_ns()
+        match.patch(0, keys)
+        samples.append(time.perf_counter_ns() - t0)
+    return samples
+
+
+def stage_editor(match, reps, rng):
+    """紀錄明細改一列動作 (位置隨機) 後的重算"""
+    samples = []
+    for _ in range(reps):
+        delta = {"edited_rows": {rng.randrange(len(match)): {"原始動作": rng.choice(OUR_POINTS + OUR_ERRORS)}}}
+        t0 = time.perf_counter_ns()
+        match.apply_editor_delta(delta)
+        samples.append(time.perf_counter_ns() - t0)
+    return samples
+
+
+def stage_stats(match, reps):
+    samples = []
+    for _ in range(reps):
+        t0 = time.perf_counter_ns()
+        match.stats_table()
+        samples.append(time.perf_counter_ns() - t0)
+    return samples
+
+
+def stage_stats_html(match, reps, cached):
+    """
+    鋪色統計表的繪製：由統計矩陣組 HTML。
+    cached=False 為紀錄變動後重建，True 為版本沒變、沿用快取的字串 (介面只剩送出字串)。
+    """
+    html = stats_html(*match.stats.table(match.seen_players))
+    samples = []
+    for _ in range(reps):
+        t0 = time.perf_counter_ns()
+        len(html if cached else stats_html(*match.stats.table(match.seen_players)))
+        samples.append(time.perf_counter_ns() - t0)
+    return samples
+
+
+def stage_metrics(match, reps):
+    """效率指標 (事件陣列向量運算)"""
+    samples = []
+    for _ in range(reps):
+        t0 = time.perf_counter_ns()
+        match_metrics(match)
+        samples.append(time.perf_counter_ns() - t0)
+    return samples
+
+
+def stage_export(match, reps):
+    """單局 Excel 匯出 (統計表 + 紀錄明細)"""
+    samples = []
+    for _ in range(reps):
+        t0 = time.perf_counter_ns()
+        build_excel(match, 1)
+        samples.append(time.perf_counter_ns() - t0)
+    return samples
+
+
+def run_size(n_events, seed, quick):
+    events = synth_events(n_events, seed=seed)
+    rng = random.Random(seed)
+    heavy_reps = 1 if quick else max(1, min(20, 200_000 // n_events))
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = EventJournal(os.path.join(tmp, "bench.sqlite3"))
+        results["log_event"] = summarize(stage_log_event(events, journal))
+        journal.flush()
+        results["log_event"]["peak_kib"] = peak_memory_kib(lambda: stage_log_event(events, journal))
+        journal.close()
+
+    match = build_match(events)
+    retained = peak_memory_kib(lambda: build_match(events))
+    try:
+        match.stats_table()  # 先載入 pandas，不算進第一次量測
+    except ImportError:
+        pass
+    results["match_memory"] = {"n": n_events, "bytes_per_event": retained * 1024 / n_events}
+
+    stages = {
+        "recalculate_scores": lambda: stage_recalculate(match, heavy_reps),
+        "editor_rescore": lambda: stage_editor(match, 5 if quick else 50, rng),
+        "stats_build": lambda: stage_stats(match, 5 if quick else 20),
+        "stats_html_build": lambda: stage_stats_html(match, 5 if quick else 20, cached=False),
+        "stats_html_redisplay": lambda: stage_stats_html(match, 5 if quick else 20, cached=True),
+        "metrics": lambda: stage_metrics(match, 5 if quick else 20),
+        "excel_export": lambda: stage_export(match, 1 if quick or n_events > 10_000 else 3),
+    }
+    for name, fn in stages.items():
+        try:
+            results[name] = summarize(fn())
+            results[name]["peak_kib"] = peak_memory_kib(fn)
+        except ImportError as e:  # pandas / xlsxwriter 未安裝時略過
+            results[name] = {"skipped": str(e)}
+    return results
+
+
+# ---------- 輸出 / 比較 ----------
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(report):
+    print(f"{'size':>8} {'stage':<20} {'p50 us':>11} {'p90 us':>11} {'p99 us':>11} {'peak KiB':>10}")
+    for size, stages in report["results"].items():
+        for name, r in stages.items():
+            if "skipped" in r:
+                print(f"{size:>8} {name:<20} skipped ({r['skipped']})")
+            elif "bytes_per_event" in r:
+                print(f"{size:>8} {name:<20} {r['bytes_per_event']:>11.1f} bytes/event")
+            else:
+                print(f"{size:>8} {name:<20} {r['p50_us']:>11.1f} {r['p90_us']:>11.1f} {r['p99_us']:>11.1f} {r['peak_kib']:>10.1f}")
+
+
+def compare(report, baseline, threshold):
+    """列出各階段 p50 / p99 與基準的比值，回傳變慢超過 threshold 的項目數"""
+    regressions = 0
+    print(f"\ncompare with {baseline['meta'].get('git')} ({baseline['meta'].get('timestamp')})")
+    print(f"{'size':>8} {'stage':<20} {'p50 x':>8} {'p99 x':>8}")
+    for size, stages in report["results"].items():
+        for name, r in stages.items():
+            base = baseline["results"].get(size, {}).get(name)
+            if not base or "p50_us" not in r or "p50_us" not in base: continue
+            ratios = [r[k] / base[k] if base[k] else float("inf") for k in ("p50_us", "p99_us")]
+            flag = "  <-- slower" if ratios[0] > 1 + threshold else ""
+            regressions += bool(flag)
+            print(f"{size:>8} {name:<20} {ratios[0]:>8.2f} {ratios[1]:>8.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES), help="事件筆數，逗號分隔")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="每個階段只跑少量次數")
+    parser.add_argument("--out", help="結果 JSON 路徑")
+    parser.add_argument("--compare", help="與先前的結果 JSON 比較")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p50 變慢超過此比例視為退步")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "quick": args.quick,
+        },
+        "results": {},
+    }
+    for n in (int(x) for x in args.sizes.split(",")):
+        report["results"][str(n)] = run_size(n, args.seed, args.quick)
+
+    print_results(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
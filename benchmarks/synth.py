@@ -0,0 +1,54 @@
+"""
+合成比賽資料
+
+依一般回合流程 (發球 / 接發 → 接球、舉球、攻擊 → 得分或失誤) 產生動作序列，
+動作全部取自 ACTION_EFFECTS，同一個 seed 產生的資料固定不變。
+"""
+import random
+
+from recorder import ROSTER_DB, ACTION_EFFECTS, roster_label
+
+OUR_POINTS = [a for a, e in ACTION_EFFECTS.items() if e == 1 and "對手" not in a]
+OPP_ERRORS = [a for a, e in ACTION_EFFECTS.items() if e == 1 and "對手" in a]
+OUR_ERRORS = [a for a, e in ACTION_EFFECTS.items() if e == -1]
+
+# 回合中段常見動作與權重
+RALLY_CONTACTS = [("接球A", 3), ("接球B", 3), ("舉球", 5), ("舉球好球", 2), ("攻擊", 5), ("處理球", 2), ("攔網", 2)]
+
+
+def synth_rally(rng, players):
+    """回傳一個回合的 [(球員顯示字串或 None, 原始動作)]"""
+    rally = []
+    if rng.random() < 0.5:
+        rally.append((rng.choice(players), "發球"))
+    else:
+        reception = rng.choices(["接發A", "接發B", "接發失誤"], weights=[5, 4, 1])[0]
+        rally.append((rng.choice(players), reception))
+        if reception == "接發失誤":
+            return rally
+
+    labels, weights = zip(*RALLY_CONTACTS)
+    for action in rng.choices(labels, weights=weights, k=rng.randint(1, 4)):
+        rally.append((rng.choice(players), action))
+
+    outcome = rng.choices(["point", "opp_error", "error"], weights=[45, 20, 35])[0]
+    if outcome == "point":
+        rally.append((rng.choice(players), rng.choice(OUR_POINTS)))
+    elif outcome == "opp_error":
+        rally.append((None, rng.choice(OPP_ERRORS)))
+    else:
+        rally.append((rng.choice(players), rng.choice(OUR_ERRORS)))
+    return rally
+
+
+def synth_events(n_events, seed=0, start_seconds=9 * 3600):
+    """產生 n_events 筆 (時間秒數, 球員顯示字串或 None, 原始動作)"""
+    rng = random.Random(seed)
+    players = [roster_label(p) for p in ROSTER_DB[:7]]
+    events = []
+    seconds = start_seconds
+    while len(events) < n_events:
+        for player, action in synth_rally(rng, players):
+            seconds = (seconds + rng.randint(2, 12)) % 86400
+            events.append((seconds, player, action))
+    return events[:n_events]
@@ -0,0 +1,24 @@
+"""
+排球比賽紀錄核心：規則表、事件儲存、計分與統計。
+
+不依賴 streamlit，import 時也不載入 pandas；LogsAPP.py 只是建在上面的介面。
+"""
+from .rules import (
+    ROSTER_DB, ORDERED_ROWS, ROW_CATEGORY, SCORE_ROWS_LIST, ERROR_ROWS_LIST, SCORE_TOTAL_ROW, ERROR_TOTAL_ROW,
+    ACTION_EFFECTS, ACTION_MAP, roster_label, get_short_name, short_sort_key, classify_action, event_player,
+)
+from .events import Codebook, EventStore, Interner, CLOCK, clock_to_seconds, seconds_to_clock, stamp_to_seconds
+from .stats import StatsMatrix, STATS_ROWS, ROW_COLORS, ROW_STYLES, stats_html
+from .rally import RallyIndex
+from .history import History
+from .roster import Player, Roster, DEFAULT_ROSTER, load_roster, load_rosters
+from .match import Match
+from .metrics import METRIC_ROWS, match_metrics, metrics_from_stats
+from .export import build_excel, build_workbook, write_workbook, XLSX_MIME
+from .clips import anchor_at, clip_list, clips_csv, clips_edl, events_between, parse_video_time, video_clock
+from .journal import EventJournal
+from .season import SeasonStore
+from .hub import MatchHub
+from .perf import PerfLog, RerunProfiler, approx_nbytes, approx_size_kib
+from .memory import SessionCache, SessionRegistry
+from .jobs import ExportJob, ExportPool
@@ -0,0 +1,227 @@
+"""
+批次分析：掃描資料夾裡下載的 {比賽}_G{局}.xlsx，重新讀入 Logs 工作表，
+用與介面相同的規則 (Match) 重算每局的球員統計，合併成賽季總表。
+
+    python -m recorder.batch exports/                       # 報表寫到 exports/season_report.xlsx
+    python -m recorder.batch exports/ --out report.json -j 8
+
+檔案分給多個行程平行讀取；每個檔案的結果記在資料夾內的 manifest，
+下次執行時大小與修改時間都沒變的檔案直接沿用上次的結果。
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .export import row_color, write_metrics
+from .match import Match
+from .metrics import match_rallies, metrics_from_stats
+from .rules import short_sort_key
+from .stats import STATS_ROWS
+
+MANIFEST_NAME = ".recorder_manifest.json"
+REPORT_NAME = "season_report.xlsx"
+MANIFEST_VERSION = 2
+
+FILE_PATTERN = re.compile(r"^(?P<match>.*)_G(?P<set>\d+)\.xlsx$")
+LOGS_SHEET = re.compile(r"^(?:G(?P<set>\d+)_)?Logs$")
+
+
+def scan(root):
+    """資料夾 (含子資料夾) 裡的 xlsx，回傳相對路徑，略過 Excel 的暫存檔與報表本身"""
+    found = []
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(".xlsx") and not name.startswith("~$") and name != REPORT_NAME:
+                found.append(os.path.relpath(os.path.join(dirpath, name), root))
+    return sorted(found)
+
+
+def ingest_workbook(path):
+    """
+    讀入一個活頁簿的所有 Logs 工作表，每局重算一次。
+    回傳 [{set, events, score, rallies, cells}]，cells 為 {統計列: {統計欄: 次數}} (只留非 0)，
+    rallies 為 Sideout / Break 回合數 (metrics.rally_counts)。
+    """
+    from openpyxl import load_workbook
+
+    file_set = FILE_PATTERN.match(os.path.basename(path))
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        results = []
+        for ws in wb.worksheets:
+            m = LOGS_SHEET.match(ws.title)
+            if not m: continue
+            rows = ws.iter_rows(values_only=True)
+            header = [str(h) if h is not None else "" for h in next(rows, ())]
+            missing = [c for c in ("時間", "球員") if c not in header]
+            if missing or ("原始動作" not in header and "動作" not in header):
+                raise ValueError(f"{ws.title}: 缺少欄位 {missing or ['原始動作']}")
+
+            records = [dict(zip(header, ("" if v is None else str(v) for v in row))) for row in rows]
+            match = Match()
+            for record in reversed(records):  # 工作表是新的在上
+                if record.get("球員"): match.record_event(record)
+
+            set_no = m.group("set") or (file_set.group("set") if file_set else None)
+            table_rows, cols, values = match.stats.table(match.seen_players)
+            results.append({
+                "set": int(set_no) if set_no else None,
+                "events": len(match),
+                "score": [match.my_score, match.opp_score],
+                "rallies": list(match_rallies(match)),
+                "cells": {
+                    r: {c: v for c, v in zip(cols, counts) if v}
+                    for r, counts in zip(table_rows, values) if any(counts)
+                },
+            })
+        return results
+    finally:
+        wb.close()
+
+
+def _ingest(args):
+    root, rel = args
+    try:
+        return rel, ingest_workbook(os.path.join(root, rel)), None
+    except Exception as e:  # 壞檔只記錄，不中斷整批
+        return rel, None, f"{type(e).__name__}: {e}"
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION: return manifest["files"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def save_manifest(path, files):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def run(root, jobs=None, manifest_path=None, exclude=()):
+    """
+    分析 root 底下的活頁簿，回傳 (各檔結果 {相對路徑: entry}, 錯誤 {相對路徑: 訊息}, 重讀的檔數)。
+    entry: {size, mtime_ns, match, sets}
+    """
+    manifest_path = manifest_path or os.path.join(root, MANIFEST_NAME)
+    cached = load_manifest(manifest_path)
+    files, todo = {}, []
+    for rel in scan(root):
+        if rel in exclude: continue
+        st = os.stat(os.path.join(root, rel))
+        entry = cached.get(rel)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            files[rel] = entry
+        else:
+            m = FILE_PATTERN.match(os.path.basename(rel))
+            files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                          "match": m.group("match") if m else os.path.splitext(os.path.basename(rel))[0]}
+            todo.append(rel)
+
+    errors = {}
+    work = [(root, rel) for rel in todo]
+    jobs = min(jobs or os.cpu_count() or 1, len(work) or 1)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            done = list(pool.map(_ingest, work, chunksize=max(1, len(work) // (jobs * 4))))
+    else:
+        done = map(_ingest, work)
+    for rel, sets, error in done:
+        if error:
+            errors[rel] = error
+            del files[rel]
+        else:
+            files[rel]["sets"] = sets
+
+    save_manifest(manifest_path, files)
+    return files, errors, len(todo)
+
+
+def merge(files):
+    """各局結果加總成賽季總表 (列名, 欄名, 數值)"""
+    cells = Counter()
+    players = set()
+    for entry in files.values():
+        for s in entry["sets"]:
+            for row, counts in s["cells"].items():
+                for col, n in counts.items():
+                    cells[(row, col)] += n
+                    if col not in ("Total", "對手"): players.add(col)
+    cols = sorted(players, key=short_sort_key) + ["Total"]
+    if any(col == "對手" for _, col in cells): cols.append("對手")
+    return STATS_ROWS, cols, [[cells[(r, c)] for c in cols] for r in STATS_ROWS]
+
+
+def merge_rallies(files):
+    return [sum(x) for x in zip((0, 0, 0, 0), *(s["rallies"] for e in files.values() for s in e["sets"]))]
+
+
+def write_report(path, files, table):
+    """報表：.json 或 .xlsx (Season_Stats 賽季總表 + Season_Metrics 效率指標 + Files 各局摘要)"""
+    rows, cols, values = table
+    metrics = metrics_from_stats(rows, cols, values, merge_rallies(files))
+    summary = [
+        [rel, entry["match"], s["set"], s["events"], f"{s['score'][0]}:{s['score'][1]}"]
+        for rel, entry in sorted(files.items()) for s in entry["sets"]
+    ]
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "stats": {"rows": rows, "columns": cols, "values": values},
+                "metrics": dict(zip(["rows", "columns", "values"], metrics)),
+                "files": [dict(zip(["file", "match", "set", "events", "score"], r)) for r in summary],
+            }, f, ensure_ascii=False, indent=2)
+        return
+
+    import xlsxwriter
+
+    wb = xlsxwriter.Workbook(path, {'constant_memory': True})
+    header = wb.add_format({'bold': True, 'border': 1})
+    fills = {}
+    ws = wb.add_worksheet("Season_Stats")
+    ws.write_row(0, 0, ["動作"] + cols, header)
+    for r, (row_name, counts) in enumerate(zip(rows, values), start=1):
+        color = row_color(row_name)
+        if color and color not in fills:
+            fills[color] = wb.add_format({'bg_color': color, 'border': 1, 'bold': color == '#CFE2F3'})
+        ws.write_row(r, 0, [row_name] + counts, fills.get(color))
+    write_metrics(wb.add_worksheet("Season_Metrics"), metrics, header)
+    ws = wb.add_worksheet("Files")
+    ws.write_row(0, 0, ["檔案", "比賽", "局", "紀錄筆數", "比分"], header)
+    for r, line in enumerate(summary, start=1):
+        ws.write_row(r, 0, line)
+    wb.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="存放匯出活頁簿的資料夾")
+    parser.add_argument("--out", help=f"報表路徑 (.xlsx 或 .json)，預設為 <root>/{REPORT_NAME}")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="行程數 (預設為 CPU 數)")
+    parser.add_argument("--manifest", help=f"manifest 路徑 (預設為 <root>/{MANIFEST_NAME})")
+    args = parser.parse_args(argv)
+
+    out = args.out or os.path.join(args.root, REPORT_NAME)
+    exclude = {os.path.relpath(os.path.abspath(out), os.path.abspath(args.root))}  # 報表本身不要讀回來
+    files, errors, reread = run(args.root, args.jobs, args.manifest, exclude)
+    write_report(out, files, merge(files))
+
+    n_sets = sum(len(e["sets"]) for e in files.values())
+    print(f"{len(files)} files ({reread - len(errors)} read, {len(files) - reread + len(errors)} unchanged), {n_sets} sets -> {out}")
+    for rel, error in errors.items():
+        print(f"  skipped {rel}: {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
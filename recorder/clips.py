@@ -0,0 +1,118 @@
+"""
+影片對時與剪輯清單
+
+每局一個對時點 anchor = (時戳 ns, 影片秒數)，意思是「這個時刻在影片的第幾秒」：
+錄影開始時按下 (現在 = 影片 0 秒)，或事後在影片裡找到某一筆紀錄 (例如第一球發球) 對上。
+影片時間和時戳只差一個位移，「影片 00:41:10 ~ 00:43:00 之間的事件」換算成時戳後
+直接在 EventStore.stamps 上二分搜尋；剪輯清單可匯出 CSV 或 CMX3600 EDL 給剪輯軟體。
+"""
+import csv
+import io
+
+from .events import CLOCK
+
+CLIP_PRE = 5    # 每個片段從事件前幾秒開始
+CLIP_POST = 3   # 到事件後幾秒結束
+EDL_FPS = 30
+CLIP_COLUMNS = ["#", "影片開始", "影片結束", "時間", "球員", "動作", "原始動作", "比分"]
+
+
+def parse_video_time(text):
+    """"hh:mm:ss" / "mm:ss" / 秒數 (可有小數) -> 秒數；格式不對回傳 None"""
+    try:
+        seconds = 0.0
+        for part in str(text).strip().split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    except ValueError:
+        return None
+
+
+def video_clock(seconds):
+    """秒數 -> "hh:mm:ss.s" """
+    seconds = max(0.0, seconds)
+    return f"{int(seconds // 3600):02d}:{int(seconds // 60 % 60):02d}:{seconds % 60:04.1f}"
+
+
+def anchor_at(match, video_seconds, i=None):
+    """對時點：第 i 筆紀錄 (沒給就是現在) 出現在影片的 video_seconds 秒"""
+    stamp = CLOCK.now_ns() if i is None else match.events.stamps[i]
+    return stamp, float(video_seconds)
+
+
+def video_seconds(anchor, stamp):
+    return anchor[1] + (stamp - anchor[0]) / 1e9
+
+
+def video_to_stamp(anchor, seconds):
+    return anchor[0] + round((seconds - anchor[1]) * 1e9)
+
+
+def events_between(match, anchor, start, end):
+    """影片時間 [start, end] 秒之間的事件位置"""
+    return match.events.between(video_to_stamp(anchor, start), video_to_stamp(anchor, end))
+
+
+def clip_list(match, anchor, rows=None, actions=None, players=None, start=None, end=None, pre=CLIP_PRE, post=CLIP_POST):
+    """
+    剪輯清單：rows (統計列，例如 "攻擊被攔"；加總列涵蓋組成它的各列)、actions (原始動作)、
+    players (背號 / "對手") 為 None 表示不篩選；start / end 為影片秒數範圍。篩選條件先換成代碼，逐筆只比整數。
+    """
+    events = match.events
+    cb = events.codebook
+    positions = events.between(
+        float("-inf") if start is None else video_to_stamp(anchor, start),
+        float("inf") if end is None else video_to_stamp(anchor, end),
+    )
+    row_codes = None if rows is None else {cb.rows.get(r) for r in rows}
+    action_codes = None if actions is None else {cb.actions.get(a) for a in actions}
+    short_codes = None if players is None else {cb.shorts.get(p) for p in players}
+
+    clips = []
+    for i in positions:
+        action = events.actions[i]
+        if row_codes is not None and cb.row_of[action] not in row_codes and cb.total_of[action] not in row_codes: continue
+        if action_codes is not None and action not in action_codes: continue
+        if short_codes is not None and cb.short_of[events.players[i]] not in short_codes: continue
+        t = video_seconds(anchor, events.stamps[i])
+        record = events.record(i)
+        clips.append({
+            "#": len(clips) + 1, "影片開始": max(0.0, t - pre), "影片結束": t + post, "事件": i,
+            **{c: record[c] for c in ("時間", "球員", "動作", "原始動作", "比分")},
+        })
+    return clips
+
+
+def clips_csv(clips):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CLIP_COLUMNS)
+    for clip in clips:
+        writer.writerow([
+            clip["#"], video_clock(clip["影片開始"]), video_clock(clip["影片結束"]),
+            *(clip[c] for c in CLIP_COLUMNS[3:]),
+        ])
+    return out.getvalue()
+
+
+def _timecode(seconds, fps):
+    frames = round(max(0.0, seconds) * fps)
+    s, f = divmod(frames, fps)
+    return f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}:{f:02d}"
+
+
+def clips_edl(clips, title="clips", fps=EDL_FPS, reel="AX"):
+    """CMX3600 EDL：片段依序接在時間軸上，備註為 背號 動作 比分"""
+    lines = [f"TITLE: {title}", "FCM: NON-DROP FRAME", ""]
+    record = 0.0
+    for clip in clips:
+        length = clip["影片結束"] - clip["影片開始"]
+        if length <= 0: continue  # 整段在影片開始之前，沒有畫面
+        lines.append(
+            f"{clip['#']:03d}  {reel:<8} V     C        "
+            f"{_timecode(clip['影片開始'], fps)} {_timecode(clip['影片結束'], fps)} "
+            f"{_timecode(record, fps)} {_timecode(record + length, fps)}"
+        )
+        lines.append(f"* COMMENT: {clip['球員']} {clip['原始動作']} {clip['比分']}".rstrip())
+        record += length
+    return "\n".join(lines) + "\n"
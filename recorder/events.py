@@ -0,0 +1,209 @@
+"""
+欄位式事件儲存
+
+每筆事件只存整數代碼 (時間秒數、時戳、球員代碼、原始動作代碼) 與累計比分，
+各欄是一個 array；顯示用的字串 (球員、動作、結果、比分) 只在介面與匯出時才組出來。
+
+時戳是奈秒 (epoch) 的牆上時間，錨定在 monotonic 時鐘上，且同一局內嚴格遞增：
+同一秒內的連按保有先後、跨午夜或系統校時也不會亂序，stamps 本身就是排好序的時間索引，
+「某段時間內的事件」以二分搜尋取得 (影片對時見 clips.py)。
+"""
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+NO_CODE = 0xFFFF
+
+
+class Interner:
+    """字串 <-> 整數代碼，代碼依首次出現順序配發，只增不減"""
+    __slots__ = ("labels", "codes")
+
+    def __init__(self, labels=()):
+        self.labels = []
+        self.codes = {}
+        for label in labels:
+            self.code(label)
+
+    def code(self, label):
+        code = self.codes.get(label)
+        if code is None:
+            code = self.codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def get(self, label, default=None):
+        return self.codes.get(label, default)
+
+    def label(self, code):
+        return self.labels[code]
+
+    def __len__(self):
+        return len(self.labels)
+
+
+class Codebook:
+    """
+    動作 / 統計列 / 球員 的代碼表。
+    classify(原始動作) -> (分數影響, 統計列, 加總列或 None)，short_name(球員) -> 統計欄名；
+    兩者只在代碼第一次配發時呼叫一次，之後都是查 array。
+    """
+
+    def __init__(self, classify, short_name, actions=(), players=()):
+        self.classify = classify
+        self.short_name = short_name
+        self.actions = Interner()
+        self.rows = Interner()
+        self.players = Interner()
+        self.shorts = Interner()
+        self.effect = array('b')     # 動作代碼 -> 1 得分 / -1 失誤 / 0 繼續
+        self.row_of = array('H')     # 動作代碼 -> 統計列代碼
+        self.total_of = array('H')   # 動作代碼 -> 加總列代碼 (NO_CODE 表示不計入)
+        self.short_of = array('H')   # 球員代碼 -> 統計欄代碼
+        for label in actions:
+            self.action_code(label)
+        for label in players:
+            self.player_code(label)
+
+    def action_code(self, label):
+        code = self.actions.code(label)
+        if code == len(self.effect):
+            effect, row, total = self.classify(label)
+            self.effect.append(effect)
+            self.row_of.append(self.rows.code(row))
+            self.total_of.append(NO_CODE if total is None else self.rows.code(total))
+        return code
+
+    def player_code(self, label):
+        code = self.players.code(label)
+        if code == len(self.short_of):
+            self.short_of.append(self.shorts.code(self.short_name(label)))
+        return code
+
+
+class EventClock:
+    """程序啟動時的牆上時間 + monotonic 經過時間：奈秒解析度，程序內不會倒退"""
+
+    def __init__(self):
+        self.wall0 = time.time_ns()
+        self.mono0 = time.monotonic_ns()
+
+    def now_ns(self):
+        return self.wall0 + time.monotonic_ns() - self.mono0
+
+
+CLOCK = EventClock()
+
+
+def stamp_to_seconds(stamp):
+    """時戳 -> 當地時間的當日秒數 (紀錄明細顯示的「時間」)"""
+    t = datetime.fromtimestamp(stamp / 1e9)
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+def _stamp(value):
+    """紀錄裡的時戳 (舊紀錄、手動新增的列沒有；pandas 可能給 NaN)"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def clock_to_seconds(text):
+    try:
+        h, m, s = (int(x) for x in str(text).split(":"))
+        return h * 3600 + m * 60 + s
+    except ValueError:
+        return -1
+
+
+def seconds_to_clock(seconds):
+    if seconds < 0: return ""
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class EventStore:
+    """
+    依時間順序的事件，只在尾端附加；my/opp 是每筆事件後的累計比分。
+    stamps 嚴格遞增：沒有時戳或時戳不大於前一筆時 (舊紀錄、插在前面的列) 取前一筆 + 1 ns。
+    """
+    __slots__ = ("codebook", "times", "stamps", "players", "actions", "my", "opp")
+
+    RESULT_LABELS = {1: "得分", -1: "失誤", 0: "繼續"}
+
+    def __init__(self, codebook):
+        self.codebook = codebook
+        self.times = array('i')
+        self.stamps = array('q')
+        self.players = array('H')
+        self.actions = array('H')
+        self.my = array('H')
+        self.opp = array('H')
+
+    def __len__(self):
+        return len(self.actions)
+
+    @property
+    def my_score(self):
+        return self.my[-1] if self.my else 0
+
+    @property
+    def opp_score(self):
+        return self.opp[-1] if self.opp else 0
+
+    def append(self, seconds, player, action, stamp=None):
+        """附加一筆事件 (代碼)，累計比分 O(1)"""
+        effect = self.codebook.effect[action]
+        my, opp = self.my_score, self.opp_score
+        last = self.stamps[-1] if self.stamps else 0
+        self.times.append(seconds)
+        self.stamps.append(stamp if stamp is not None and stamp > last else last + 1)
+        self.players.append(player)
+        self.actions.append(action)
+        self.my.append(my + (effect == 1))
+        self.opp.append(opp + (effect == -1))
+
+    def truncate(self, start):
+        """刪除第 start 筆以後的事件；之前的累計比分不受影響"""
+        for col in (self.times, self.stamps, self.players, self.actions, self.my, self.opp):
+            del col[start:]
+
+    def nbytes(self):
+        """各欄 array 實際佔用的位元組數"""
+        return sum(col.itemsize * len(col) for col in (self.times, self.stamps, self.players, self.actions, self.my, self.opp))
+
+    def between(self, start_ns, end_ns):
+        """時戳落在 [start_ns, end_ns] 的事件位置 (二分搜尋，O(log n))"""
+        return range(bisect_left(self.stamps, start_ns), bisect_right(self.stamps, end_ns))
+
+    # ---------- 編碼 / 解碼 (介面與匯出邊界) ----------
+
+    def encode(self, record):
+        cb = self.codebook
+        raw_action = record.get("原始動作", record.get("動作", ""))
+        return (
+            clock_to_seconds(record.get("時間", "")), cb.player_code(record["球員"]), cb.action_code(raw_action),
+            _stamp(record.get("時戳")),
+        )
+
+    def key(self, i):
+        return self.times[i], self.players[i], self.actions[i], self.stamps[i]
+
+    def record(self, i):
+        cb = self.codebook
+        action = self.actions[i]
+        effect = cb.effect[action]
+        return {
+            "時間": seconds_to_clock(self.times[i]),
+            "球員": cb.players.label(self.players[i]),
+            "動作": cb.rows.label(cb.row_of[action]),
+            "原始動作": cb.actions.label(action),
+            "結果": self.RESULT_LABELS[effect],
+            "比分": f"{self.my[i]}:{self.opp[i]}" if effect else "",
+            "時戳": self.stamps[i],
+        }
+
+    def records(self, start=0, newest_first=False):
+        order = range(len(self) - 1, start - 1, -1) if newest_first else range(start, len(self))
+        return [self.record(i) for i in order]
@@ -0,0 +1,96 @@
+"""
+Excel 匯出：統計表 (依列別鋪色) + 紀錄明細。
+
+統計表旁附效率指標 (metrics)。直接用 xlsxwriter 逐列寫出 (constant_memory 模式)，寫過的列立即落地到暫存檔，
+整場或整季多局匯出時，記憶體用量不隨局數與紀錄筆數成長；不需要 pandas。
+"""
+import io
+
+from .rules import ROW_CATEGORY
+from .stats import ROW_COLORS
+from .metrics import match_metrics
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+LOG_COLUMNS = ["時間", "球員", "動作", "原始動作", "結果", "比分"]
+PROGRESS_EVERY = 2000  # 紀錄明細每寫幾列回報一次進度
+
+
+def row_color(row_name):
+    """統計列 -> 底色 (沒有分類的列為 None)"""
+    return ROW_COLORS.get(ROW_CATEGORY.get(row_name))
+
+
+def write_workbook(target, sets, constant_memory=True, progress=None):
+    """
+    把一或多局寫進同一個活頁簿。target 為檔案路徑或 file-like；
+    sets 為 [(局數, Match)] (可以是逐局載入的 generator)，依序寫完一局才取下一局。
+    單局時工作表為 G{局}_Stats + G{局}_Metrics + Logs (與下載按鈕相同)，
+    多局時每局為 G{局}_Stats + G{局}_Metrics + G{局}_Logs。
+    progress(局數, 已寫紀錄數, 該局紀錄數) 於寫紀錄明細時定期呼叫 (背景匯出顯示進度用)。
+    """
+    import xlsxwriter
+
+    sets = iter(sets)
+    first = next(sets, None)
+    second = next(sets, None)
+    single = second is None
+
+    wb = xlsxwriter.Workbook(target, {'constant_memory': constant_memory})
+    header = wb.add_format({'bold': True, 'border': 1})
+    fills = {}
+
+    def fill(color):
+        if color not in fills:
+            fills[color] = wb.add_format({'bg_color': color, 'border': 1, 'bold': color == ROW_COLORS["total"]})
+        return fills[color]
+
+    def write_set(set_no, match):
+        # 統計表
+        ws = wb.add_worksheet(f"G{set_no}_Stats")
+        rows, cols, values = match.stats.table(match.seen_players)
+        ws.write_row(0, 0, ["動作"] + cols, header)
+        for r, (row_name, counts) in enumerate(zip(rows, values), start=1):
+            color = row_color(row_name)
+            ws.write_row(r, 0, [row_name] + counts, fill(color) if color else None)
+
+        write_metrics(wb.add_worksheet(f"G{set_no}_Metrics"), match_metrics(match), header)
+
+        # 紀錄明細 (新的在上)
+        ws = wb.add_worksheet("Logs" if single else f"G{set_no}_Logs")
+        ws.write_row(0, 0, LOG_COLUMNS, header)
+        events = match.events
+        n = len(events)
+        for r, i in enumerate(range(n - 1, -1, -1), start=1):
+            record = events.record(i)
+            ws.write_row(r, 0, [record[c] for c in LOG_COLUMNS])
+            if progress and r % PROGRESS_EVERY == 0: progress(set_no, r, n)
+        if progress: progress(set_no, n, n)
+
+    for item in (first, second):
+        if item is not None: write_set(*item)
+    for item in sets:
+        write_set(*item)
+    wb.close()
+
+
+def write_metrics(ws, table, header):
+    """效率指標表；無法計算的格子留空"""
+    rows, cols, values = table
+    ws.write_row(0, 0, ["指標"] + cols, header)
+    for r, (name, line) in enumerate(zip(rows, values), start=1):
+        ws.write(r, 0, name)
+        for c, v in enumerate(line, start=1):
+            if v is not None: ws.write_number(r, c, v)
+
+
+def build_excel(match, set_no):
+    """回傳單局 xlsx 檔內容 (bytes)；工作表: G{局}_Stats、G{局}_Metrics、Logs"""
+    return build_workbook([(set_no, match)])
+
+
+def build_workbook(sets, progress=None):
+    """回傳多局 xlsx 檔內容 (bytes)；sets、progress 同 write_workbook"""
+    buffer = io.BytesIO()
+    write_workbook(buffer, sets, progress=progress)
+    return buffer.getvalue()
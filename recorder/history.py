@@ -0,0 +1,34 @@
+"""
+復原 / 重做
+
+每個可復原的操作記成 (位置, 舊事件, 新事件, context)：從「位置」起的事件 (代碼) 由舊換成新，
+復原 / 重做就是反方向或正方向再 patch 一次。按鍵是 (n, [], [新事件])，
+復原只是把最後一筆拿掉，比分、統計與回合索引都以 O(1) 扣回，不需要整段重算。
+context 由呼叫端自訂 (例如按鍵前選中的球員)，復原時原樣交回。
+"""
+from collections import deque
+
+HISTORY_LIMIT = 500
+
+
+class History:
+    def __init__(self, limit=HISTORY_LIMIT):
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = []
+
+    def record(self, command):
+        """新的操作：清掉可重做的紀錄"""
+        self.undo_stack.append(command)
+        self.redo_stack.clear()
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
@@ -0,0 +1,46 @@
+"""
+程序內共用的比賽 (live hub)
+
+同一個伺服器上所有 session 看的是同一場比賽：記分端共用 hub 裡的 Match、比賽資訊與陣容，
+修改時持有 hub.lock；觀看端 (計分板、板凳教練) 只讀 snapshot。
+snapshot 以 (紀錄版本, 比賽資訊) 為鍵，每個版本只算一次並由所有觀看端共用，
+觀看端變多也不會重做統計表。
+"""
+import threading
+
+
+class MatchHub:
+    def __init__(self, match, meta, lineup):
+        self.lock = threading.RLock()
+        self.match = match
+        self.meta = meta
+        self.lineup = lineup
+        self.lineup_version = 0  # 陣容每次變動加一；換人選單的 key 帶著它，其他記分端的選單才會跟著更新
+        self.live_set = meta["set"]
+        self.journaled_meta = dict(meta)
+        # 上次存入 / 載入賽季時的紀錄版本：沒變動就不必再存 (從日誌還原的局還沒存過)
+        self.saved_version = None if len(match) else match.version
+        self._snapshot = (None, None)
+
+    @property
+    def version(self):
+        """紀錄或比賽資訊有變動就不同 (觀看端用來判斷要不要更新)"""
+        return self.match.version, tuple(sorted((k, str(v)) for k, v in self.meta.items()))
+
+    def replace(self, match, live_set=None):
+        """換局 / 重置：換成新的 Match (剛從賽季載入或空白，視為已存)"""
+        with self.lock:
+            self.match = match
+            self.saved_version = match.version
+            if live_set is not None: self.live_set = live_set
+
+    def snapshot(self, render):
+        """
+        render(match, meta) 產生觀看端要顯示的內容；同一版本只呼叫一次，
+        結果由所有觀看端共用 (不可修改)。
+        """
+        with self.lock:
+            version = self.version
+            if self._snapshot[0] != version:
+                self._snapshot = (version, render(self.match, dict(self.meta)))
+            return self._snapshot[1]
@@ -0,0 +1,97 @@
+"""
+背景匯出工作 (全程序共用的 worker pool)
+
+匯出排進執行緒池在背景產生，介面只輪詢進度，檔案好了才出現下載按鈕；
+記分端按鍵不必等活頁簿寫完。工作以 key (例如 ("set", 紀錄版本, 局數)) 識別：
+相同 key 還在做或已經做好就直接沿用，不重做；只保留最近 keep 個做好的檔案。
+build 在背景執行緒執行，只能用建立工作時就抓好的資料 (例如 Match.copy())，不能碰 hub 或 st.*。
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+EXPORT_WORKERS = 2
+EXPORT_KEEP = 8
+
+
+class ExportJob:
+    __slots__ = ("key", "label", "file_name", "status", "progress", "data", "error", "submitted", "finished")
+
+    def __init__(self, key, label, file_name):
+        self.key = key
+        self.label = label
+        self.file_name = file_name
+        self.status = "queued"  # queued / running / done / error
+        self.progress = 0.0
+        self.data = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+
+    @property
+    def pending(self):
+        return self.status in ("queued", "running")
+
+    def report(self, fraction):
+        self.progress = min(max(fraction, 0.0), 1.0)
+
+
+class ExportPool:
+    def __init__(self, workers=EXPORT_WORKERS, keep=EXPORT_KEEP):
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key, build, label="", file_name=""):
+        """
+        排入一個匯出工作並回傳 ExportJob；build(report) 回傳檔案內容 (bytes)，
+        report(0 ~ 1) 回報進度。相同 key 的工作還在做或已完成時直接回傳那一個 (失敗的會重做)。
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != "error":
+                self._jobs.move_to_end(key)
+                return job
+            job = self._jobs[key] = ExportJob(key, label, file_name)
+            self._trim()
+        self._executor.submit(self._run, job, build)
+        return job
+
+    def _run(self, job, build):
+        job.status = "running"
+        try:
+            job.data = build(job.report)
+            job.progress = 1.0
+            job.status = "done"
+        except Exception as e:
+            logging.exception("export %s failed", job.label)
+            job.error = str(e)
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+
+    def _trim(self):
+        """做好的檔案只留最近 keep 個 (還在做的不動)"""
+        done = [k for k, j in self._jobs.items() if not j.pending]
+        for k in done[:max(0, len(done) - self.keep)]:
+            del self._jobs[k]
+
+    def jobs(self):
+        """所有工作，新的在前"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def pending(self):
+        with self._lock:
+            return any(j.pending for j in self._jobs.values())
+
+    def nbytes(self):
+        """做好的檔案佔用的位元組數"""
+        with self._lock:
+            return sum(len(j.data) for j in self._jobs.values() if j.data)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,181 @@
+"""
+本機事件日誌 (SQLite WAL)
+
+每筆紀錄與每次編輯都先附加到日誌，累積一定數量後壓縮成一份快照；
+重新整理頁面或伺服器重啟後，以「最後快照 + 之後的日誌」還原整場紀錄。
+寫入由背景執行緒批次提交 (group commit)，不佔用按鍵的回應時間。
+"""
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+
+# 日誌累積多少筆操作後壓縮成快照
+SNAPSHOT_EVERY = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    seq     INTEGER PRIMARY KEY AUTOINCREMENT,
+    op      TEXT NOT NULL,
+    start   INTEGER,
+    payload TEXT
+);
+CREATE TABLE IF NOT EXISTS snapshot (
+    id   INTEGER PRIMARY KEY CHECK (id = 1),
+    seq  INTEGER NOT NULL,
+    logs TEXT NOT NULL,
+    meta TEXT
+);
+"""
+
+
+class EventJournal:
+    """
+    append / replace / set_meta / reset 只把操作放進佇列，立即返回；
+    背景執行緒一次取出佇列中所有操作，在同一個交易裡寫入 (一次 fsync)。
+    日誌同時維護一份紀錄鏡像，用來寫快照，不需要回頭讀 session_state。
+    """
+
+    def __init__(self, path, snapshot_every=SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._logs, self._meta = [], None
+        self._since_snapshot = self._read()
+
+        self._thread = threading.Thread(target=self._run, name="event-journal", daemon=True)
+        self._thread.start()
+
+    # ---------- 寫入 (非阻塞) ----------
+
+    def append(self, record):
+        self._queue.put(("append", None, dict(record)))
+
+    def replace(self, start, records):
+        """編輯後從第 start 筆 (時間順序) 起的紀錄整段取代"""
+        self._queue.put(("replace", start, [dict(r) for r in records]))
+
+    def set_meta(self, meta):
+        self._queue.put(("meta", None, dict(meta)))
+
+    def reset(self):
+        self._queue.put(("reset", None, None))
+
+    # ---------- 讀取 ----------
+
+    def flush(self):
+        """等待佇列中的操作全部寫入"""
+        self._queue.join()
+
+    def load(self):
+        """回傳目前的 (紀錄, 比賽資訊)，紀錄依時間順序"""
+        self.flush()
+        with self._lock:
+            return [dict(r) for r in self._logs], (dict(self._meta) if self._meta else None)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    # ---------- 內部 ----------
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _read(self):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT seq, logs, meta FROM snapshot WHERE id = 1").fetchone()
+            seq = 0
+            if row:
+                seq = row[0]
+                self._logs = json.loads(row[1])
+                self._meta = json.loads(row[2]) if row[2] else None
+
+            tail = conn.execute(
+                "SELECT op, start, payload FROM journal WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+            for op, start, payload in tail:
+                self._apply(op, start, json.loads(payload) if payload else None)
+            return len(tail)
+        finally:
+            conn.close()
+
+    def _apply(self, op, start, payload):
+        if op == "append":
+            self._logs.append(payload)
+        elif op == "replace":
+            del self._logs[start:]
+            self._logs.extend(payload)
+        elif op == "meta":
+            self._meta = payload
+        elif op == "reset":
+            self._logs, self._meta = [], None
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            try:
+                with self._lock:
+                    self._commit(conn, [item for item in batch if item is not None])
+            except sqlite3.Error:
+                logging.exception("event journal write failed")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                conn.close()
+                return
+
+    def _commit(self, conn, ops):
+        """整批操作在同一個交易裡寫入"""
+        with conn:
+            for op, start, payload in ops:
+                if op == "reset":
+                    conn.execute("DELETE FROM journal")
+                    conn.execute("DELETE FROM snapshot")
+                    self._since_snapshot = 0
+                else:
+                    conn.execute(
+                        "INSERT INTO journal (op, start, payload) VALUES (?, ?, ?)",
+                        (op, start, json.dumps(payload, ensure_ascii=False, default=str)),
+                    )
+                    self._since_snapshot += 1
+                self._apply(op, start, payload)
+
+        if self._since_snapshot >= self.snapshot_every:
+            self._write_snapshot(conn)
+
+    def _write_snapshot(self, conn):
+        """把鏡像寫成快照，並刪除快照已涵蓋的日誌"""
+        seq = conn.execute("SELECT MAX(seq) FROM journal").fetchone()[0]
+        if seq is None:
+            return
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshot (id, seq, logs, meta) VALUES (1, ?, ?, ?)",
+                (
+                    seq,
+                    json.dumps(self._logs, ensure_ascii=False, default=str),
+                    json.dumps(self._meta, ensure_ascii=False, default=str) if self._meta else None,
+                ),
+            )
+            conn.execute("DELETE FROM journal WHERE seq <= ?", (seq,))
+        self._since_snapshot = 0
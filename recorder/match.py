@@ -0,0 +1,166 @@
+"""
+一局比賽的狀態：事件、累計比分、球員統計與出現過的球員。
+不依賴 streamlit / pandas，批次分析與測試可直接使用。
+"""
+import copy
+import itertools
+
+from .events import Codebook, EventStore, CLOCK, stamp_to_seconds
+from .rules import ACTION_EFFECTS, classify_action, event_player
+from .roster import DEFAULT_ROSTER
+from .stats import StatsMatrix
+from .rally import RallyIndex
+from .history import History
+
+# 全程序共用的版本號，重置後的新 Match 也不會和舊的版本撞號
+_VERSIONS = itertools.count(1)
+
+
+class Match:
+    """
+    events 依時間順序只在尾端附加；每次變動 version 都會換新，
+    介面可以用它判斷快取 (表格、匯出) 是否還有效。
+    """
+
+    def __init__(self, roster=DEFAULT_ROSTER, lineup=()):
+        self.roster = roster
+        self.codebook = Codebook(classify_action, roster.short_name, actions=ACTION_EFFECTS, players=roster.options)
+        self.events = EventStore(self.codebook)
+        self.stats = StatsMatrix(self.codebook)
+        self.rallies = RallyIndex(self.events, lineup)
+        self.history = History()
+        self.seen_players = {}  # 統計欄名 -> None，當有序集合用 (保留出現順序，查詢 O(1))
+        self.version = next(_VERSIONS)
+        for label in lineup:
+            self.see_player(label)
+
+    def __len__(self):
+        return len(self.events)
+
+    @property
+    def my_score(self):
+        return self.events.my_score
+
+    @property
+    def opp_score(self):
+        return self.events.opp_score
+
+    def nbytes(self):
+        """事件陣列的大小 (診斷面板估算 session 記憶體用)"""
+        return self.events.nbytes()
+
+    def copy(self):
+        """
+        獨立的副本 (背景匯出用)：事件陣列、統計與回合索引各自複製，之後原本的 Match 怎麼改都不影響副本。
+        代碼表與名單只增不減，直接共用；副本不帶復原紀錄。
+        """
+        memo = {id(self.codebook): self.codebook, id(self.roster): self.roster, id(self.history): History()}
+        return copy.deepcopy(self, memo)
+
+    def set_lineup(self, lineup):
+        """換人 / 調整陣容 (之後的回合生效)"""
+        for label in lineup:
+            self.see_player(label)
+        self.rallies.set_lineup(lineup)
+
+    def see_player(self, player_str):
+        if "對手" in player_str: return
+        self.seen_players.setdefault(self.roster.short_name(player_str))
+
+    # ---------- 新增 ----------
+
+    def append(self, seconds, player, action, stamp=None):
+        """附加一筆事件 (代碼)，比分、統計與回合索引都只做 O(1) 更新"""
+        self.events.append(seconds, player, action, stamp)
+        self.rallies.append(len(self.events) - 1)
+        self.see_player(self.codebook.players.label(player))
+        self.stats.count(action, player)
+        self.version = next(_VERSIONS)
+
+    def log(self, action_key, player, seconds=None, context=None):
+        """按下動作按鈕：player 是選中球員的顯示字串 (對手失誤可為 None)；可復原，context 於復原時交回"""
+        cb = self.codebook
+        final_player = event_player(action_key, player)
+        stamp = CLOCK.now_ns()
+        if seconds is None: seconds = stamp_to_seconds(stamp)
+        key = (seconds, cb.player_code(final_player), cb.action_code(action_key), stamp)
+        self.history.record((len(self.events), [], [key], context))
+        self.append(*key)
+
+    def record_event(self, record):
+        """附加一筆以顯示字串表示的紀錄 (日誌還原 / 匯入用)"""
+        self.append(*self.events.encode(record))
+
+    # ---------- 修改 ----------
+
+    def patch(self, start, keys):
+        """把第 start 筆 (時間順序) 以後的事件換成 keys (代碼)，只重算這一段的比分與統計"""
+        events = self.events
+        for i in range(start, len(events)):
+            self.stats.count(events.actions[i], events.players[i], -1)
+        events.truncate(start)
+        self.rallies.truncate(start)
+        for key in keys:
+            self.append(*key)
+        self.version = next(_VERSIONS)
+
+    def apply_editor_delta(self, delta):
+        """
+        套用 data_editor 的 edited_rows / added_rows / deleted_rows，回傳最早變動的位置 (無變動回傳 None)。
+        表格是新的在上，列位置 pos 對應第 n-1-pos 筆事件。
+        """
+        events = self.events
+        added = delta.get("added_rows", [])
+        if any(not r.get("球員") or not r.get("原始動作") for r in added): return None  # 新增列還沒填完
+
+        n = len(events)
+        edited = {n - 1 - int(pos): changes for pos, changes in delta.get("edited_rows", {}).items()}
+        deleted = {n - 1 - int(pos) for pos in delta.get("deleted_rows", [])}
+        if not added and not edited and not deleted: return None
+
+        # 新增列接在表格最下方，也就是時間順序的最前面
+        start = 0 if added else min(set(edited) | deleted)
+        keys = [events.encode(r) for r in reversed(added)]
+        if added:
+            # 沒有時戳的新增列排在第一筆之前，時戳取第一筆的前幾 ns (否則會從 1970 起算，影片對時全錯)
+            first = events.stamps[0] if n else CLOCK.now_ns()
+            keys = [key if key[3] is not None else (*key[:3], first - len(keys) + j) for j, key in enumerate(keys)]
+        for i in range(start, n):
+            if i in deleted: continue
+            keys.append(events.encode({**events.record(i), **edited[i]}) if i in edited else events.key(i))
+
+        self.history.record((start, [events.key(i) for i in range(start, n)], keys, None))
+        self.patch(start, keys)
+        return start
+
+    # ---------- 復原 / 重做 ----------
+
+    def undo(self):
+        """復原上一個操作，回傳 (變動位置, context)；沒有可復原的操作回傳 None"""
+        if not self.history.can_undo: return None
+        command = self.history.undo_stack.pop()
+        start, old, new, context = command
+        self.patch(start, old)
+        self.history.redo_stack.append(command)
+        return start, context
+
+    def redo(self):
+        """重做上一個被復原的操作，回傳 (變動位置, context)"""
+        if not self.history.can_redo: return None
+        command = self.history.redo_stack.pop()
+        start, old, new, context = command
+        self.patch(start, new)
+        self.history.undo_stack.append(command)
+        return start, context
+
+    # ---------- 統計 ----------
+
+    def stats_table(self):
+        """統計表 DataFrame (用到時才載入 pandas)"""
+        import pandas as pd
+
+        rows, cols, values = self.stats.table(self.seen_players)
+        stats = pd.DataFrame(values, index=rows, columns=cols)
+        stats.index.name = "動作"
+        stats.columns.name = "ShortName"
+        return stats
@@ -0,0 +1,115 @@
+"""
+session 記憶體預算
+
+每個 session 的衍生資料 (紀錄明細 DataFrame、統計表 HTML) 都放在自己的 SessionCache，
+以 (名稱) 為鍵、紀錄版本為準；總大小超過預算時先丟最久沒用的，需要時再重建。
+比賽紀錄本身在 hub (全程序一份)，已結束的局存在賽季資料庫，要看統計或匯出時才載入，
+session 不保留整場的資料。
+
+SessionRegistry 以 weak reference 登記全程序的 SessionCache：session 結束、快取被回收就自動消失，
+伺服器端可以列出每個 session 佔用的記憶體，並清掉閒置太久的 session 的快取，
+一台整個週末開著的平板不會一直占住記憶體。
+"""
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from .perf import approx_nbytes
+
+SESSION_BUDGET_KIB = 64 * 1024
+SESSION_IDLE_SECONDS = 30 * 60
+
+
+class SessionCache:
+    """
+    name -> (版本, 值, 大小)，依最近使用排序；get 可能在下載用的其他執行緒呼叫，內部自帶鎖。
+    last_seen 只由 touch() 更新 (使用者操作時呼叫)；get 不更新，定時輪詢的 fragment 讀快取不算使用。
+    """
+
+    def __init__(self, budget_kib=SESSION_BUDGET_KIB, label=""):
+        self.budget_kib = budget_kib
+        self.label = label
+        self.entries = OrderedDict()
+        self.state_kib = 0.0  # 快取以外的 session 狀態 (由 session 自己回報)
+        self.last_seen = time.time()
+        self.evictions = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def kib(self):
+        return sum(e[2] for e in self.entries.values()) / 1024
+
+    def touch(self):
+        self.last_seen = time.time()
+
+    def get(self, name, version, build):
+        """版本相同就沿用，否則 build() 重建並放入快取 (超過預算時丟掉最久沒用的其他項目)"""
+        with self._lock:
+            hit = self.entries.get(name)
+            if hit is not None and hit[0] == version:
+                self.entries.move_to_end(name)
+                return hit[1]
+        value = build()  # 建表可能很久，不佔著鎖
+        with self._lock:
+            self.entries[name] = (version, value, approx_nbytes(value))
+            self.entries.move_to_end(name)
+            self._evict(self.budget_kib * 1024, keep=name)
+        return value
+
+    def _evict(self, limit, keep=None):
+        total = sum(e[2] for e in self.entries.values())
+        for name in list(self.entries):
+            if total <= limit: break
+            if name == keep: continue
+            total -= self.entries.pop(name)[2]
+            self.evictions += 1
+
+    def discard(self, name, version=None):
+        """丟掉一項；有給 version 時只在快取的版本不同時才丟"""
+        with self._lock:
+            hit = self.entries.get(name)
+            if hit is not None and (version is None or hit[0] != version):
+                del self.entries[name]
+
+    def clear(self):
+        """丟掉全部快取，回傳釋放的 KiB"""
+        with self._lock:
+            freed = self.kib
+            self.evictions += len(self.entries)
+            self.entries.clear()
+            return freed
+
+
+class SessionRegistry:
+    """全程序的 SessionCache (weak reference)"""
+
+    def __init__(self):
+        self._sessions = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def register(self, key, cache):
+        with self._lock:
+            self._sessions[key] = cache
+
+    def caches(self):
+        with self._lock:
+            return list(self._sessions.items())
+
+    def trim_idle(self, idle_seconds=SESSION_IDLE_SECONDS):
+        """清掉閒置超過 idle_seconds 的 session 的快取，回傳釋放的 KiB"""
+        now = time.time()
+        return sum(cache.clear() for _, cache in self.caches() if cache.entries and now - cache.last_seen > idle_seconds)
+
+    def rows(self):
+        """每個 session 一列：快取 / 其他狀態 / 合計 KiB、快取項目數、被丟掉的次數、閒置秒數"""
+        now = time.time()
+        rows = [{
+            "session": key, "label": cache.label, "cache_kib": cache.kib, "state_kib": cache.state_kib,
+            "total_kib": cache.kib + cache.state_kib, "entries": len(cache), "evictions": cache.evictions,
+            "idle_s": now - cache.last_seen,
+        } for key, cache in self.caches()]
+        return sorted(rows, key=lambda r: -r["total_kib"])
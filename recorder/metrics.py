@@ -0,0 +1,155 @@
+"""
+效率指標：攻擊效率、接發 A/B 比例、發球得分/失誤率、Sideout / Break 率。
+
+球員指標全部由統計列次數算出，直接在事件代碼陣列上以 NumPy 向量運算：
+動作代碼 -> 統計列代碼 -> bincount 成 (統計列, 球員) 次數矩陣，沒有逐筆的 Python 迴圈，
+單局、整季與批次分析共用同一組公式 (metrics_table)。
+Sideout / Break 是全隊指標：每一分的發球方是上一分的得分方，第一分看第一筆紀錄是不是我方發球
+(單局由 rally.RallyIndex 逐筆維護，跨局由 rally_counts 一次向量計算)。
+"""
+
+# 指標用到的統計列
+ATTACK_KILL_ROWS = ["直接得分", "打手得分", "吊球得分"]
+ATTACK_ERROR_ROWS = ["攻擊出界", "攻擊掛網", "攻擊犯規"]
+ATTACK_BLOCKED_ROWS = ["攻擊被攔"]
+ATTACK_CONTINUE_ROWS = ["攻擊擊球繼續"]
+RECEPTION_A_ROWS = ["接發好球繼續"]
+RECEPTION_B_ROWS = ["接發繼續"]
+RECEPTION_ERROR_ROWS = ["接發失誤"]
+SERVE_ACE_ROWS = ["發球得分"]
+SERVE_ERROR_ROWS = ["發球出界", "發球掛網", "發球犯規"]
+SERVE_CONTINUE_ROWS = ["發球繼續"]
+SERVE_ROWS = SERVE_ACE_ROWS + SERVE_ERROR_ROWS + SERVE_CONTINUE_ROWS
+
+METRIC_ROWS = [
+    "攻擊次數", "攻擊效率", "攻擊得分率",
+    "接發次數", "接發A%", "接發B%", "接發失誤%",
+    "發球次數", "發球得分%", "發球失誤%",
+    "Sideout%", "Break%",
+]
+PERCENT_ROWS = {"攻擊得分率", "接發A%", "接發B%", "接發失誤%", "發球得分%", "發球失誤%", "Sideout%", "Break%"}
+
+
+def _ratio(num, den):
+    import numpy as np
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1), np.nan)
+
+
+def metrics_table(cols, counts, rallies=(0, 0, 0, 0)):
+    """
+    cols: 欄名 (含 Total)；counts(統計列名) -> 各欄次數的陣列；
+    rallies: 全隊 (接發球回合, Sideout 成功, 發球回合, Break 成功)，只放在 Total 欄。
+    回傳 (指標名, 欄名, 數值)，無法計算的格子為 None；百分比以 0 ~ 100 表示，攻擊效率為 -1 ~ 1。
+    """
+    import numpy as np
+
+    def total(rows):
+        return sum((np.asarray(counts(r), dtype=float) for r in rows), np.zeros(len(cols)))
+
+    kills, errors, blocked = total(ATTACK_KILL_ROWS), total(ATTACK_ERROR_ROWS), total(ATTACK_BLOCKED_ROWS)
+    attacks = kills + errors + blocked + total(ATTACK_CONTINUE_ROWS)
+    rec_a, rec_b, rec_err = total(RECEPTION_A_ROWS), total(RECEPTION_B_ROWS), total(RECEPTION_ERROR_ROWS)
+    receptions = rec_a + rec_b + rec_err
+    aces, serve_errors = total(SERVE_ACE_ROWS), total(SERVE_ERROR_ROWS)
+    serves = aces + serve_errors + total(SERVE_CONTINUE_ROWS)
+
+    team = np.full(len(cols), np.nan)
+    sideout, breaks = team.copy(), team.copy()
+    if "Total" in cols:
+        t = cols.index("Total")
+        receive_rallies, sideouts, serve_rallies, break_points = rallies
+        if receive_rallies: sideout[t] = 100 * sideouts / receive_rallies
+        if serve_rallies: breaks[t] = 100 * break_points / serve_rallies
+
+    values = {
+        "攻擊次數": attacks,
+        "攻擊效率": _ratio(kills - errors - blocked, attacks),
+        "攻擊得分率": 100 * _ratio(kills, attacks),
+        "接發次數": receptions,
+        "接發A%": 100 * _ratio(rec_a, receptions),
+        "接發B%": 100 * _ratio(rec_b, receptions),
+        "接發失誤%": 100 * _ratio(rec_err, receptions),
+        "發球次數": serves,
+        "發球得分%": 100 * _ratio(aces, serves),
+        "發球失誤%": 100 * _ratio(serve_errors, serves),
+        "Sideout%": sideout,
+        "Break%": breaks,
+    }
+    digits = {"攻擊效率": 3}
+    table = []
+    for name in METRIC_ROWS:
+        v = values[name]
+        table.append([None if np.isnan(x) else round(float(x), digits.get(name, 1)) for x in v])
+    return METRIC_ROWS, cols, table
+
+
+def rally_counts(effects, first_point, first_server, mask=None):
+    """
+    effects: 每一分的結果 (1 我方得分 / -1 對手得分)，依時間順序、可包含多局；
+    first_point: 該分是不是一局的第一分；first_server: 每一分所在局的第一發球方 (1 我方 / -1 對手)；
+    mask: 只計入部分回合 (例如某個輪轉)，發球方仍以完整順序推算。
+    回傳 (接發球回合, Sideout 成功, 發球回合, Break 成功)
+    """
+    import numpy as np
+
+    effects = np.asarray(effects, dtype=np.int8)
+    if not len(effects): return 0, 0, 0, 0
+    server = np.empty_like(effects)
+    server[1:] = effects[:-1]  # 上一分的得分方發球
+    server = np.where(np.asarray(first_point, dtype=bool), np.asarray(first_server, dtype=np.int8), server)
+    receiving = server == -1
+    won = effects == 1
+    if mask is not None:
+        mask = np.asarray(mask, dtype=bool)
+        receiving, won = receiving[mask], won[mask]
+    return int(receiving.sum()), int((receiving & won).sum()), int((~receiving).sum()), int((~receiving & won).sum())
+
+
+def match_rallies(match):
+    """一局的 Sideout / Break 回合數 (查 Match 的回合索引)"""
+    return match.rallies.rally_counts()
+
+
+def match_metrics(match):
+    """一局的球員效率指標 (指標名, 欄名, 數值)；欄為出現過的球員 + Total，與統計表一致"""
+    import numpy as np
+
+    cb = match.codebook
+    events = match.events
+    shorts = list(match.seen_players)
+    cols = shorts + ["Total"]
+    n_rows, n_shorts = len(cb.rows), len(cb.shorts)
+
+    actions = np.frombuffer(events.actions, dtype=np.uint16)
+    players = np.frombuffer(events.players, dtype=np.uint16)
+    row_codes = np.frombuffer(cb.row_of, dtype=np.uint16)[actions].astype(np.intp)
+    short_codes = np.frombuffer(cb.short_of, dtype=np.uint16)[players].astype(np.intp)
+    grid = np.bincount(row_codes * n_shorts + short_codes, minlength=n_rows * n_shorts).reshape(n_rows, n_shorts)
+
+    opponent = cb.shorts.get("對手")
+    mine = np.ones(n_shorts, dtype=bool)
+    if opponent is not None: mine[opponent] = False
+    col_index = [cb.shorts.get(s) for s in shorts]
+
+    def counts(row):
+        code = cb.rows.get(row)
+        if code is None: return np.zeros(len(cols))
+        line = grid[code]
+        return np.append(np.array([line[c] if c is not None else 0 for c in col_index]), line[mine].sum())
+
+    return metrics_table(cols, counts, match_rallies(match))
+
+
+def metrics_from_stats(rows, cols, values, rallies=(0, 0, 0, 0)):
+    """由統計表 (StatsMatrix.table / SeasonStore.table 的格式) 算指標，欄位與統計表相同 (對手欄除外)"""
+    import numpy as np
+
+    keep = [i for i, c in enumerate(cols) if c != "對手"]
+    grid = np.asarray(values, dtype=float).reshape(len(rows), len(cols))[:, keep]
+    index = {r: i for i, r in enumerate(rows)}
+
+    def counts(row):
+        return grid[index[row]] if row in index else np.zeros(len(keep))
+    return metrics_table([cols[i] for i in keep], counts, rallies)
@@ -0,0 +1,110 @@
+"""
+效能紀錄：每次 rerun 與各熱路徑 (按鍵、重算、統計表、表格渲染、匯出) 的耗時。
+
+每個 session 一份 PerfLog，只保留最近 maxlen 筆，記錄本身只是 deque.append，
+可以常駐開啟；診斷面板再把它彙總、匯出成 CSV / JSON。
+"""
+import cProfile
+import csv
+import io
+import json
+import pstats
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+
+FIELDS = ["ts", "name", "ms", "events", "state_kib"]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values: return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def approx_nbytes(value, depth=3):
+    """
+    物件大小的粗估：有 nbytes() 的物件 (Match) 以實際陣列大小計，
+    DataFrame 用 pandas 自己的 (deep) 大小，Styler 以底下的 DataFrame 計，容器往下看 depth 層。
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if callable(nbytes): return nbytes()
+    if hasattr(value, "to_html") and hasattr(value, "data"): return sys.getsizeof(value.data)  # pandas Styler
+    size = sys.getsizeof(value)
+    if depth and isinstance(value, (list, tuple, set, frozenset, deque)):
+        size += sum(approx_nbytes(v, depth - 1) for v in value)
+    elif depth and isinstance(value, dict):
+        size += sum(approx_nbytes(k, depth - 1) + approx_nbytes(v, depth - 1) for k, v in value.items())
+    return size
+
+
+def approx_size_kib(values):
+    """session_state 大小的粗估 (KiB)"""
+    return sum(approx_nbytes(v) for v in values) / 1024
+
+
+class PerfLog:
+    """session 的效能紀錄；沒有鎖，只在該 session 的 script 執行緒寫入 (背景 worker 不寫)"""
+
+    def __init__(self, maxlen=5000):
+        self.samples = deque(maxlen=maxlen)
+
+    def nbytes(self):
+        return approx_nbytes(self.samples)
+
+    def add(self, name, seconds, events=None, state_kib=None):
+        self.samples.append({
+            "ts": time.time(), "name": name, "ms": seconds * 1000,
+            "events": events, "state_kib": state_kib,
+        })
+
+    @contextmanager
+    def timed(self, name, events=None):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0, events)
+
+    def summary(self):
+        """各項目的 次數 / p50 / p95 / 最大值 (ms)"""
+        by_name = {}
+        for s in self.samples:
+            by_name.setdefault(s["name"], []).append(s["ms"])
+        rows = []
+        for name, values in sorted(by_name.items()):
+            values.sort()
+            rows.append({
+                "name": name, "count": len(values),
+                "p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95), "max_ms": values[-1],
+            })
+        return rows
+
+    def to_csv(self):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(self.samples)
+        return buffer.getvalue()
+
+    def to_json(self):
+        return json.dumps(list(self.samples), ensure_ascii=False)
+
+
+class RerunProfiler:
+    """cProfile 單次 rerun：start() 於腳本開頭、stop() 於結尾，回傳前 limit 項的文字報表"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self, limit=40, sort="cumulative"):
+        self.profile.disable()
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
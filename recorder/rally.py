@@ -0,0 +1,187 @@
+"""
+回合切分與輪轉狀態機
+
+每筆事件附加時 O(1) 更新：得分/失誤結束目前回合，下一回合由得分方發球；
+我方在對手發球時得分 (Sideout) 就輪轉一次。每個回合記下 起訖位置、發球方、輪轉、
+場上陣容快照、結果與接發品質，並維護各輪轉的回合清單與計數，
+「各輪轉得失分」、「接發品質與 Sideout」之類的查詢只查索引，不必重掃紀錄。
+"""
+from array import array
+from collections import Counter
+
+from .events import Interner, NO_CODE
+from .metrics import SERVE_ROWS, RECEPTION_A_ROWS, RECEPTION_B_ROWS, RECEPTION_ERROR_ROWS
+
+COURT_SIZE = 6  # active_lineup 前 6 格為場上位置 1 ~ 6，第 7 格 (自由球員) 不參與輪轉
+RECEPTION_ROWS = RECEPTION_A_ROWS + RECEPTION_B_ROWS + RECEPTION_ERROR_ROWS
+
+
+class RallyIndex:
+    """
+    回合 i 的欄位：starts / ends (事件位置，ends 為不含；進行中的回合 end 為 0)、
+    servers (1 我方 / -1 對手)、rotations (1 ~ 6)、lineups (陣容代碼)、outcomes (1 / -1，進行中為 0)、
+    receptions (第一次接發的動作代碼，沒有為 NO_CODE)。event_rally 是每筆事件所屬的回合。
+    陣容只記目前的場上陣容；編輯紀錄後重算的回合一律用目前陣容拍快照。
+    """
+
+    def __init__(self, events, lineup=()):
+        self.events = events
+        self.codebook = events.codebook
+        self.lineup_codes = Interner()
+        self.court = tuple(lineup[:COURT_SIZE])
+        self.starts, self.ends = array('I'), array('I')
+        self.servers, self.outcomes = array('b'), array('b')
+        self.rotations = array('B')
+        self.lineups, self.receptions = array('H'), array('H')
+        self.event_rally = array('I')
+        self.by_rotation = {r: array('I') for r in range(1, COURT_SIZE + 1)}  # 輪轉 -> 回合編號
+        self.counts = Counter()  # (輪轉, 發球方, 結果) -> 回合數
+        self.reception_counts = Counter()  # (接發動作代碼, 結果) -> 回合數
+        self._reset_state()
+
+    def _reset_state(self):
+        self.next_server = None  # 第一回合看第一筆紀錄
+        self.rotation = 1
+        self.open = False
+
+    def __len__(self):
+        return len(self.starts)
+
+    # ---------- 更新 ----------
+
+    def set_lineup(self, lineup):
+        """換人：之後開始的回合使用新陣容"""
+        self.court = tuple(lineup[:COURT_SIZE])
+
+    def lineup_snapshot(self, rotation):
+        """輪轉 rotation 時位置 1 ~ 6 上的球員 (位置 1 為發球者)"""
+        court = self.court
+        if len(court) < COURT_SIZE: return court
+        k = rotation - 1
+        return tuple(court[(j + k) % COURT_SIZE] for j in range(COURT_SIZE))
+
+    def append(self, i):
+        """第 i 筆事件已附加到 events"""
+        cb = self.codebook
+        action, player = self.events.actions[i], self.events.players[i]
+        row = cb.rows.label(cb.row_of[action])
+        ours = cb.shorts.label(cb.short_of[player]) != "對手"
+
+        if not self.open:
+            server = self.next_server
+            if server is None: server = 1 if row in SERVE_ROWS and ours else -1
+            self.starts.append(i)
+            self.ends.append(0)
+            self.servers.append(server)
+            self.outcomes.append(0)
+            self.rotations.append(self.rotation)
+            self.lineups.append(self.lineup_codes.code(self.lineup_snapshot(self.rotation)))
+            self.receptions.append(NO_CODE)
+            self.by_rotation[self.rotation].append(len(self.starts) - 1)
+            self.open = True
+
+        r = len(self.starts) - 1
+        self.event_rally.append(r)
+        if row in RECEPTION_ROWS and ours and self.receptions[r] == NO_CODE:
+            self.receptions[r] = action
+
+        effect = cb.effect[action]
+        if effect:
+            self._close(r, i + 1, effect)
+
+    def _close(self, r, end, outcome):
+        self.ends[r] = end
+        self.outcomes[r] = outcome
+        server = self.servers[r]
+        self.counts[(self.rotations[r], server, outcome)] += 1
+        if server == -1: self.reception_counts[(self.receptions[r], outcome)] += 1
+        if outcome == 1 and server == -1:
+            self.rotation = self.rotation % COURT_SIZE + 1  # Sideout 輪轉
+        self.next_server = outcome
+        self.open = False
+
+    def truncate(self, start):
+        """刪除第 start 筆以後的事件：丟掉從該回合起的回合，狀態回到該回合開始前"""
+        if start >= len(self.event_rally): return
+        r = self.event_rally[start]
+        first = self.starts[r]
+        for k in range(len(self.starts) - 1, r - 1, -1):
+            if self.outcomes[k]:
+                self.counts[(self.rotations[k], self.servers[k], self.outcomes[k])] -= 1
+                if self.servers[k] == -1: self.reception_counts[(self.receptions[k], self.outcomes[k])] -= 1
+            self.by_rotation[self.rotations[k]].pop()
+
+        if r == 0:
+            self._reset_state()
+        else:
+            self.rotation = self.rotations[r]
+            self.next_server = self.servers[r]
+            self.open = False
+        for col in (self.starts, self.ends, self.servers, self.outcomes, self.rotations, self.lineups, self.receptions):
+            del col[r:]
+        del self.event_rally[first:]
+
+        for i in range(first, start):  # 同一回合中 start 之前的事件重新餵入
+            self.append(i)
+
+    # ---------- 查詢 ----------
+
+    def rally(self, r):
+        cb = self.codebook
+        reception = self.receptions[r]
+        return {
+            "start": self.starts[r],
+            "end": self.ends[r] if self.outcomes[r] else len(self.event_rally),
+            "server": self.servers[r],
+            "rotation": self.rotations[r],
+            "lineup": self.lineup_codes.label(self.lineups[r]),
+            "outcome": self.outcomes[r],
+            "reception": None if reception == NO_CODE else cb.actions.label(reception),
+        }
+
+    def rally_of(self, i):
+        """第 i 筆事件所屬的回合編號"""
+        return self.event_rally[i]
+
+    def rallies_in(self, rotation):
+        return list(self.by_rotation[rotation])
+
+    @property
+    def current(self):
+        """(目前輪轉, 下一球發球方；第一球之前為 None)"""
+        if self.open: return self.rotations[-1], self.servers[-1]
+        return self.rotation, self.next_server
+
+    def rally_counts(self):
+        """(接發球回合, Sideout 成功, 發球回合, Break 成功)，格式同 metrics.rally_counts"""
+        c = Counter()
+        for (_, server, outcome), n in self.counts.items():
+            c[(server, outcome)] += n
+        receive, serve = c[(-1, 1)] + c[(-1, -1)], c[(1, 1)] + c[(1, -1)]
+        return receive, c[(-1, 1)], serve, c[(1, 1)]
+
+    def rotation_table(self):
+        """各輪轉 [輪轉, 回合, 得分, 失分, 接發球回合, Sideout, 發球回合, Break]"""
+        table = []
+        for rot in range(1, COURT_SIZE + 1):
+            c = self.counts
+            so, sl = c[(rot, -1, 1)], c[(rot, -1, -1)]
+            bp, bl = c[(rot, 1, 1)], c[(rot, 1, -1)]
+            table.append([rot, so + sl + bp + bl, so + bp, sl + bl, so + sl, so, bp + bl, bp])
+        return table
+
+    def sideout_by_reception(self):
+        """接發品質 -> (接發球回合, Sideout 成功)；沒有接發紀錄的回合歸在 None"""
+        cb = self.codebook
+        result = {}
+        for (reception, outcome), n in self.reception_counts.items():
+            if not n: continue
+            label = None if reception == NO_CODE else cb.actions.label(reception)
+            total, won = result.get(label, (0, 0))
+            result[label] = (total + n, won + n * (outcome == 1))
+        return result
+
+    def event_rotations(self):
+        """每筆事件的輪轉 (存入賽季資料庫用)"""
+        rotations = self.rotations
+        return [rotations[r] for r in self.event_rally]
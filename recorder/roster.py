@@ -0,0 +1,119 @@
+"""
+球員名單
+
+名單從 CSV / JSON 載入 (沒有名單檔時用 rules.ROSTER_DB)，可以放好幾隊。
+顯示字串 (背號 - 姓名 (位置)) 與統計欄名在載入時就組好，
+依背號、球員 ID、顯示字串查球員都是 dict 查詢，介面不必再把字串 split 回來。
+
+CSV / JSON 欄位：背號、姓名、位置，可另有 球員ID、隊伍 (也接受 number / name / position / id / team)。
+"""
+import csv
+import json
+import os
+
+from .rules import ROSTER_DB, roster_label, get_short_name
+
+FIELD_ALIASES = {
+    "背號": ("背號", "number", "no"),
+    "姓名": ("姓名", "name"),
+    "位置": ("位置", "position", "pos"),
+    "球員ID": ("球員ID", "id", "player_id"),
+    "隊伍": ("隊伍", "team"),
+}
+
+
+class Player:
+    __slots__ = ("id", "team", "number", "name", "position", "label", "short")
+
+    def __init__(self, number, name, position, id=None, team=""):
+        self.number = str(number).strip()
+        self.name = str(name).strip()
+        self.position = str(position).strip()
+        self.team = str(team or "").strip()
+        self.id = str(id).strip() if id not in (None, "") else (f"{self.team}-{self.number}" if self.team else self.number)
+        self.label = roster_label({"背號": self.number, "姓名": self.name, "位置": self.position})
+        self.short = self.number
+
+    def __repr__(self):
+        return f"Player({self.label!r}, id={self.id!r}, team={self.team!r})"
+
+
+def _normalize(row):
+    """CSV / JSON 的一列 -> Player 參數 (欄名可以是中文或英文)"""
+    lowered = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+    values = {}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            if alias.lower() in lowered:
+                values[field] = lowered[alias.lower()]
+                break
+    missing = [f for f in ("背號", "姓名", "位置") if not values.get(f)]
+    if missing: raise ValueError(f"名單缺少欄位 {missing}: {row}")
+    return values
+
+
+class Roster:
+    """一隊的名單；labels 依名單順序，by_number / by_id / by_label 為 O(1) 查詢"""
+
+    def __init__(self, players, team=""):
+        self.team = team
+        self.players = []
+        self.by_number, self.by_id, self.by_label, self.index = {}, {}, {}, {}
+        for p in players:
+            if not isinstance(p, Player):
+                v = _normalize(p)
+                p = Player(v["背號"], v["姓名"], v["位置"], v.get("球員ID"), v.get("隊伍", team))
+            if p.number in self.by_number: raise ValueError(f"背號重複: {p.number}")
+            if p.id in self.by_id: raise ValueError(f"球員 ID 重複: {p.id}")
+            self.index[p.label] = len(self.players)
+            self.players.append(p)
+            self.by_number[p.number] = self.by_id[p.id] = self.by_label[p.label] = p
+        self.labels = [p.label for p in self.players]
+        self.numbers = [p.number for p in self.players]
+        self.options = self.labels + ["對手"]  # 紀錄明細的球員選項
+
+    def __len__(self):
+        return len(self.players)
+
+    def __iter__(self):
+        return iter(self.players)
+
+    def short_name(self, label):
+        """顯示字串 -> 統計欄名；名單外的字串 (例如舊紀錄) 才退回字串解析"""
+        p = self.by_label.get(label)
+        return p.short if p else get_short_name(label)
+
+
+def read_players(path):
+    """讀 CSV / JSON 名單檔，回傳每列的 dict"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data["players"] if isinstance(data, dict) else data
+    if ext == ".csv":
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            return list(csv.DictReader(f))
+    raise ValueError(f"不支援的名單格式: {path}")
+
+
+def load_rosters(path):
+    """名單檔 -> {隊伍: Roster}；沒有隊伍欄時全部歸在 "" 一隊"""
+    teams = {}
+    for row in read_players(path):
+        v = _normalize(row)
+        teams.setdefault(str(v.get("隊伍") or "").strip(), []).append(row)
+    return {team: Roster(rows, team) for team, rows in teams.items()}
+
+
+def load_roster(path=None, team=None):
+    """取得一隊的名單：沒有名單檔時用 ROSTER_DB；沒指定隊伍時取檔案裡的第一隊"""
+    if not path: return DEFAULT_ROSTER
+    rosters = load_rosters(path)
+    if not rosters: raise ValueError(f"名單檔沒有球員: {path}")
+    if team is None: return next(iter(rosters.values()))
+    if team not in rosters: raise KeyError(f"名單檔裡沒有隊伍 {team}，可用: {list(rosters)}")
+    return rosters[team]
+
+
+DEFAULT_ROSTER = Roster(ROSTER_DB)
@@ -0,0 +1,115 @@
+"""
+排球紀錄的規則表：球員名單、統計表列順序、動作的分數影響與統計列對應。
+"""
+
+ROSTER_DB = [
+    {"背號": "1", "姓名": "舉球A", "位置": "S"},
+    {"背號": "2", "姓名": "大砲B", "位置": "LH"},
+    {"背號": "3", "姓名": "大砲C", "位置": "LH"},
+    {"背號": "4", "姓名": "攔中D", "位置": "MB"},
+    {"背號": "5", "姓名": "攔中E", "位置": "MB"},
+    {"背號": "6", "姓名": "舉對F", "位置": "RH"},
+    {"背號": "7", "姓名": "自由G", "位置": "L"},
+    {"背號": "8", "姓名": "替補H", "位置": "LH"},
+    {"背號": "9", "姓名": "替補I", "位置": "MB"},
+]
+
+# 統計表順序
+ORDERED_ROWS = [
+    # 繼續
+    "發球繼續", "攔網繼續", "接發繼續", "接發好球繼續", 
+    "接球繼續", "接球好球繼續", "舉球繼續", "舉球好球繼續", 
+    "攻擊擊球繼續", "送球繼續",
+    # 得分
+    "發球得分", "直接得分", "對手接噴", "打手得分", "吊球得分", "送球得分", "攔網得分", 
+    "對手失誤(總計)", 
+    # 失誤
+    "發球出界", "發球掛網", "發球犯規", 
+    "攻擊出界", "攻擊掛網", "攻擊被攔", "送球失誤", "攻擊犯規", 
+    "舉球失誤", "舉球犯規", 
+    "接發失誤", "站位失誤", "接球失誤", "防守犯規", 
+    "攔網失誤", "攔網犯規"
+]
+
+# 用於計算總分的清單
+SCORE_ROWS_LIST = ["發球得分", "直接得分", "對手接噴", "打手得分", "吊球得分", "送球得分", "攔網得分"]
+ERROR_ROWS_LIST = ["發球出界", "發球掛網", "發球犯規", "攻擊出界", "攻擊掛網", "攻擊被攔", "送球失誤", "攻擊犯規", 
+                   "舉球失誤", "舉球犯規", "接發失誤", "站位失誤", "接球失誤", "防守犯規", "攔網失誤", "攔網犯規"]
+SCORE_TOTAL_ROW = "個人得分總和"
+ERROR_TOTAL_ROW = "個人失分總和"
+SCORE_ROWS = set(SCORE_ROWS_LIST)
+ERROR_ROWS = set(ERROR_ROWS_LIST)
+
+
+def _row_category(row):
+    if row in (SCORE_TOTAL_ROW, ERROR_TOTAL_ROW): return "total"
+    if "繼續" in row: return "continue"
+    if row in SCORE_ROWS or "對手" in row: return "score"
+    if row in ERROR_ROWS: return "error"
+    return None
+
+# 統計列 -> 分類 (加總 / 繼續 / 得分 / 失誤)，介面與 Excel 鋪色共用，每列只判斷一次
+ROW_CATEGORY = {row: _row_category(row) for row in ORDERED_ROWS + [SCORE_TOTAL_ROW, ERROR_TOTAL_ROW]}
+
+# 動作分數影響
+ACTION_EFFECTS = {
+    "發球": 0, "攔網": 0, "接發A": 0, "接發B": 0, "接球A": 0, "接球B": 0, 
+    "舉球": 0, "舉球好球": 0, "攻擊": 0, "處理球": 0,
+    "發球得分": 1, "攻擊得分": 1, "吊球得分": 1, "後排得分": 1, "快攻得分": 1, "修正得分": 1, "打手得分": 1, "送球得分": 1, "攔網得分": 1,
+    "對手發球出界": 1, "對手發球掛網": 1, "對手發球犯規": 1, "對手攻擊出界": 1, "對手攻擊掛網": 1, "對手送球失誤": 1, 
+    "對手攻擊犯規": 1, "對手舉球失誤": 1, "對手舉球犯規": 1, "對手防守犯規": 1, "對手攔網犯規": 1,
+    "發球出界": -1, "發球掛網": -1, "發球犯規": -1,
+    "攻擊出界": -1, "攻擊掛網": -1, "攻擊被攔": -1, "攻擊犯規": -1, "觸網": -1, "送球失誤": -1,
+    "舉球失誤": -1, "連擊": -1,
+    "接發失誤": -1, "接球失誤": -1, "防守噴球": -1, "防守落地": -1, "站位失誤": -1, "防守犯規": -1,
+    "攔網觸網": -1, "攔網出界": -1, "攔網失誤": -1, "攔網犯規": -1
+}
+
+# 顯示名稱映射
+ACTION_MAP = {
+    "發球": "發球繼續", "攔網": "攔網繼續", "接發A": "接發好球繼續", "接發B": "接發繼續",
+    "接球A": "接球好球繼續", "接球B": "接球繼續", "舉球": "舉球繼續", "舉球好球": "舉球好球繼續",
+    "攻擊": "攻擊擊球繼續", "處理球": "送球繼續",
+    "發球得分": "發球得分", "攻擊得分": "直接得分", "吊球得分": "吊球得分", "後排得分": "直接得分", 
+    "快攻得分": "直接得分", "修正得分": "直接得分", "打手得分": "打手得分", "送球得分": "送球得分", "攔網得分": "攔網得分",
+    "對手接噴": "對手接噴",
+    "發球出界": "發球出界", "發球掛網": "發球掛網", "發球犯規": "發球犯規",
+    "攻擊出界": "攻擊出界", "攻擊掛網": "攻擊掛網", "攻擊被攔": "攻擊被攔", "攻擊犯規": "攻擊犯規", "送球失誤": "送球失誤",
+    "舉球失誤": "舉球失誤", "連擊": "舉球犯規",
+    "接發失誤": "接發失誤", "接球失誤": "接球失誤", "防守犯規": "防守犯規", "站位失誤": "站位失誤",
+    "攔網失誤": "攔網失誤", "攔網觸網": "攔網犯規", "攔網犯規": "攔網犯規", "攔網出界": "攔網失誤",
+    "觸網": "攻擊犯規", "防守噴球": "接球失誤", "防守落地": "接球失誤"
+}
+
+
+def roster_label(p):
+    """名單資料 -> 顯示字串 (背號 - 姓名 (位置))"""
+    return f"{p['背號']} - {p['姓名']} ({p['位置']})"
+
+def get_short_name(p_str):
+    """顯示字串 -> 統計欄名 (背號；對手一律為 "對手")"""
+    if "對手" in p_str: return "對手"
+    return p_str.split(" - ")[0]
+
+def short_sort_key(short):
+    """統計欄排序：背號由小到大，其他 (對手等) 在後"""
+    return (not short.isdigit(), int(short) if short.isdigit() else 0, short)
+
+def classify_action(raw_action):
+    """原始動作 -> (分數影響, 統計列, 加總列)"""
+    effect = ACTION_EFFECTS.get(raw_action, 0)
+    if "對手" in raw_action and raw_action in ACTION_EFFECTS: effect = 1
+
+    stats_name = ACTION_MAP.get(raw_action, raw_action)
+    if "對手" in raw_action and raw_action not in ["對手接噴"]:
+        stats_name = "對手失誤(總計)"
+
+    total = None
+    if stats_name in SCORE_ROWS: total = SCORE_TOTAL_ROW
+    elif stats_name in ERROR_ROWS: total = ERROR_TOTAL_ROW
+    return effect, stats_name, total
+
+def event_player(action_key, player):
+    """按下動作時實際記在誰身上：對手失誤記在 "對手"，其餘記在選中的球員"""
+    if "對手" in action_key and action_key not in ["對手接噴"]: return "對手"
+    return player
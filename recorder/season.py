@@ -0,0 +1,253 @@
+"""
+賽季資料庫 (SQLite)：保存每場、每局的紀錄，跨場次查詢統計。
+
+events 保存每筆紀錄 (依 比賽 / 局 / 輪轉 標記)；counts 是每局的 (輪轉, 球員, 統計列) 次數，
+存局時一起寫入。查詢只在 counts 上依索引加總，不需要載入紀錄或重做樞紐表，
+例如「4 號對某隊所有局的攔網得分」：season.count(player="4", row="攔網得分", opponent="某隊")。
+"""
+import os
+import sqlite3
+import threading
+from collections import Counter
+
+from .rules import SCORE_ROWS_LIST, ERROR_ROWS_LIST, SCORE_TOTAL_ROW, ERROR_TOTAL_ROW, get_short_name, short_sort_key
+from .stats import STATS_ROWS
+from .match import Match
+from .roster import DEFAULT_ROSTER
+from .metrics import SERVE_ROWS, metrics_from_stats, rally_counts
+
+# 加總列 -> 組成的統計列
+TOTAL_ROWS = {SCORE_TOTAL_ROW: SCORE_ROWS_LIST, ERROR_TOTAL_ROW: ERROR_ROWS_LIST}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id         INTEGER PRIMARY KEY,
+    match_name TEXT NOT NULL,
+    date       TEXT NOT NULL,
+    opponent   TEXT NOT NULL,
+    UNIQUE (match_name, date, opponent)
+);
+CREATE INDEX IF NOT EXISTS matches_opponent ON matches (opponent);
+CREATE TABLE IF NOT EXISTS events (
+    match_id INTEGER NOT NULL REFERENCES matches (id),
+    set_no   INTEGER NOT NULL,
+    seq      INTEGER NOT NULL,
+    time     TEXT,
+    player   TEXT NOT NULL,
+    short    TEXT NOT NULL,
+    action   TEXT NOT NULL,
+    row      TEXT NOT NULL,
+    effect   INTEGER NOT NULL,
+    score    TEXT,
+    rotation INTEGER NOT NULL DEFAULT 0,
+    stamp    INTEGER,
+    PRIMARY KEY (match_id, set_no, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS events_player ON events (short, row);
+CREATE INDEX IF NOT EXISTS events_action ON events (action);
+CREATE TABLE IF NOT EXISTS counts (
+    match_id INTEGER NOT NULL,
+    set_no   INTEGER NOT NULL,
+    rotation INTEGER NOT NULL,
+    short    TEXT NOT NULL,
+    row      TEXT NOT NULL,
+    n        INTEGER NOT NULL,
+    PRIMARY KEY (match_id, set_no, rotation, short, row)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS counts_player ON counts (short, row);
+CREATE INDEX IF NOT EXISTS counts_row ON counts (row, short);
+"""
+
+
+def _meta_key(meta):
+    return meta["match_name"], str(meta["date"]), meta["opponent"]
+
+
+class SeasonStore:
+    """
+    save_set 以整局為單位取代 (同一場同一局再存一次就覆蓋)；空的局等於刪除。
+    rotation 取自 Match 的回合索引 (1 ~ 6)；0 表示未記錄。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {r[1] for r in self._conn.execute("PRAGMA table_info(events)")}
+        if "stamp" not in columns:  # 加上時戳之前建立的資料庫
+            with self._conn:
+                self._conn.execute("ALTER TABLE events ADD COLUMN stamp INTEGER")
+
+    def close(self):
+        self._conn.close()
+
+    # ---------- 寫入 ----------
+
+    def match_id(self, meta, create=True):
+        """(比賽名稱, 日期, 對手) -> 比賽 id；不存在時 create=False 回傳 None"""
+        key = _meta_key(meta)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM matches WHERE match_name = ? AND date = ? AND opponent = ?", key
+            ).fetchone()
+            if row: return row[0]
+            if not create: return None
+            return self._conn.execute("INSERT INTO matches (match_name, date, opponent) VALUES (?, ?, ?)", key).lastrowid
+
+    def save_set(self, meta, set_no, match, rotations=None):
+        """把一局 (Match) 存入賽季；rotations 為每筆事件的輪轉 (預設取自回合索引)"""
+        match_id = self.match_id(meta)
+        events = match.events
+        if rotations is None: rotations = match.rallies.event_rotations()
+        cb = events.codebook
+        rows = []
+        counts = Counter()
+        for i in range(len(events)):
+            record = events.record(i)
+            short = cb.shorts.label(cb.short_of[events.players[i]])
+            rotation = rotations[i] if rotations else 0
+            rows.append((
+                match_id, set_no, i, record["時間"], record["球員"], short, record["原始動作"],
+                record["動作"], events.codebook.effect[events.actions[i]], record["比分"], rotation, record["時戳"],
+            ))
+            counts[(rotation, short, record["動作"])] += 1
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM events WHERE match_id = ? AND set_no = ?", (match_id, set_no))
+            self._conn.execute("DELETE FROM counts WHERE match_id = ? AND set_no = ?", (match_id, set_no))
+            self._conn.executemany(
+                "INSERT INTO events (match_id, set_no, seq, time, player, short, action, row, effect, score, rotation, stamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows,
+            )
+            self._conn.executemany(
+                "INSERT INTO counts VALUES (?, ?, ?, ?, ?, ?)",
+                [(match_id, set_no, rotation, short, row, n) for (rotation, short, row), n in counts.items()],
+            )
+
+    # ---------- 讀取 ----------
+
+    def sets(self):
+        """已存的局：[{match_id, match_name, date, opponent, set, events}]"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT m.id, m.match_name, m.date, m.opponent, e.set_no, COUNT(*) FROM events e "
+                "JOIN matches m ON m.id = e.match_id GROUP BY e.match_id, e.set_no ORDER BY m.date, m.id, e.set_no"
+            ).fetchall()
+        keys = ["match_id", "match_name", "date", "opponent", "set", "events"]
+        return [dict(zip(keys, r)) for r in rows]
+
+    def match_sets(self, meta):
+        """這場比賽已存的局 (由小到大)"""
+        match_id = self.match_id(meta, create=False)
+        if match_id is None: return []
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                "SELECT DISTINCT set_no FROM events WHERE match_id = ? ORDER BY set_no", (match_id,)
+            )]
+
+    def opponents(self):
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT DISTINCT opponent FROM matches ORDER BY opponent")]
+
+    def load_set(self, meta, set_no, lineup=(), roster=DEFAULT_ROSTER):
+        """把存過的一局還原成 Match (沒有紀錄時回傳空的 Match)"""
+        match = Match(roster, lineup)
+        match_id = self.match_id(meta, create=False)
+        if match_id is None: return match
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT time, player, action, stamp FROM events WHERE match_id = ? AND set_no = ? ORDER BY seq",
+                (match_id, set_no),
+            ).fetchall()
+        for time, player, action, stamp in rows:
+            match.record_event({"時間": time, "球員": player, "原始動作": action, "時戳": stamp})
+        return match
+
+    def _where(self, player=None, row=None, opponent=None, match_id=None, set_no=None, rotation=None):
+        clauses, params = [], []
+        if player is not None:
+            clauses.append("c.short = ?")
+            params.append(get_short_name(player) if " - " in player else player)
+        if row is not None:
+            parts = TOTAL_ROWS.get(row, [row])
+            clauses.append(f"c.row IN ({','.join('?' * len(parts))})")
+            params.extend(parts)
+        for column, value in (("m.opponent", opponent), ("c.match_id", match_id), ("c.set_no", set_no), ("c.rotation", rotation)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, **filters):
+        """
+        符合條件的次數。條件: player (背號或顯示字串)、row (統計列或加總列)、opponent、match_id、set_no、rotation；
+        player 省略時為我方所有球員 (不含對手)。
+        """
+        where, params = self._where(**filters)
+        if filters.get("player") is None:
+            where += (" AND " if where else " WHERE ") + "c.short != '對手'"
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COALESCE(SUM(c.n), 0) FROM counts c JOIN matches m ON m.id = c.match_id{where}", params
+            ).fetchone()[0]
+
+    def table(self, **filters):
+        """
+        跨局統計表 (列名, 欄名, 數值)，格式同 StatsMatrix.table：
+        列為 ORDERED_ROWS + 加總列，欄為出現過的球員 (依背號) + Total (+ 對手)。
+        """
+        where, params = self._where(**filters)
+        with self._lock:
+            cells = self._conn.execute(
+                f"SELECT c.short, c.row, SUM(c.n) FROM counts c JOIN matches m ON m.id = c.match_id{where} "
+                "GROUP BY c.short, c.row", params
+            ).fetchall()
+
+        grid = Counter()
+        players = set()
+        for short, row, n in cells:
+            players.add(short)
+            grid[(row, short)] += n
+            if short != "對手": grid[(row, "Total")] += n
+        cols = sorted(players - {"對手"}, key=short_sort_key) + ["Total"]
+        if "對手" in players: cols.append("對手")
+
+        def cell(row, col):
+            return sum(grid[(r, col)] for r in TOTAL_ROWS.get(row, [row]))
+        return STATS_ROWS, cols, [[cell(row, col) for col in cols] for row in STATS_ROWS]
+
+    def rallies(self, opponent=None, match_id=None, set_no=None, rotation=None):
+        """
+        全隊 Sideout / Break 回合數 (格式同 metrics.rally_counts)。
+        只讀每局第一筆與得分/失分的紀錄；發球方以完整順序推算，rotation 只篩選計入的回合。
+        """
+        import numpy as np
+
+        where, params = self._where(opponent=opponent, match_id=match_id, set_no=set_no)
+        serve_rows = ",".join("?" * len(SERVE_ROWS))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT c.match_id, c.set_no, c.seq, c.effect, c.rotation, "
+                f"c.seq = 0 AND c.row IN ({serve_rows}) AND c.short != '對手' "
+                f"FROM events c JOIN matches m ON m.id = c.match_id"
+                f"{where}{' AND' if where else ' WHERE'} (c.effect != 0 OR c.seq = 0) "
+                "ORDER BY c.match_id, c.set_no, c.seq", SERVE_ROWS + params
+            ).fetchall()
+        if not rows: return 0, 0, 0, 0
+
+        match_ids, set_nos, seqs, effects, rotations, we_serve = np.array(rows, dtype=np.int64).T
+        set_id = np.cumsum(seqs == 0) - 1                      # 每局第一筆 (seq 0) 開始新的一局
+        first_server = np.where(we_serve[seqs == 0] == 1, 1, -1)[set_id]
+        points = effects != 0
+        point_sets = set_id[points]
+        first_point = np.r_[True, point_sets[1:] != point_sets[:-1]]
+        mask = None if rotation is None else rotations[points] == rotation
+        return rally_counts(effects[points], first_point, first_server[points], mask)
+
+    def metrics(self, **filters):
+        """跨局效率指標 (指標名, 欄名, 數值)，條件同 table；Sideout / Break 不受 player 條件影響"""
+        team = {k: v for k, v in filters.items() if k in ("opponent", "match_id", "set_no", "rotation")}
+        return metrics_from_stats(*self.table(**filters), self.rallies(**team))
@@ -0,0 +1,68 @@
+"""
+球員統計矩陣：(統計列代碼, 統計欄代碼) -> 次數，每筆事件 O(1) 增減。
+"""
+from collections import Counter
+
+from .events import NO_CODE
+from .rules import ORDERED_ROWS, SCORE_TOTAL_ROW, ERROR_TOTAL_ROW, ROW_CATEGORY
+
+# Total 欄的代碼 (統計欄代碼都 >= 0)
+TOTAL_COL = -1
+
+STATS_ROWS = ORDERED_ROWS + [SCORE_TOTAL_ROW, ERROR_TOTAL_ROW]
+
+# 列別底色 (Excel 與介面相同)
+ROW_COLORS = {"total": "#CFE2F3", "continue": "#FFF2CC", "score": "#D9EAD3", "error": "#F4CCCC"}
+ROW_STYLES = {
+    row: f"background-color: {ROW_COLORS[c]}; color: black" + ("; font-weight: bold" if c == "total" else "")
+    for row, c in ROW_CATEGORY.items() if c
+}
+
+
+def stats_html(rows, cols, values, hide_empty=False):
+    """
+    StatsMatrix.table 的 (列名, 欄名, 數值) -> 依列別鋪色的 HTML 表格，不經過 DataFrame / Styler。
+    hide_empty 時略過全為 0 的列 (加總列照列)。
+    """
+    head = "".join(f"<th>{c}</th>" for c in ["動作"] + cols)
+    body = "".join(
+        f"<tr style='{ROW_STYLES.get(r, '')}'><td>{r}</td>" + "".join(f"<td>{v}</td>" for v in line) + "</tr>"
+        for r, line in zip(rows, values) if not hide_empty or any(line) or r in (SCORE_TOTAL_ROW, ERROR_TOTAL_ROW)
+    )
+    return f"<table style='width:100%; text-align:center'><tr>{head}</tr>{body}</table>"
+
+
+class StatsMatrix:
+    """連同 Total 欄 (我方球員合計) 與 個人得分/失分總和 列一起維護"""
+
+    def __init__(self, codebook):
+        self.codebook = codebook
+        self.cells = Counter()
+        self.players = Counter()  # 統計欄代碼 -> 紀錄筆數
+        self.opponent = codebook.shorts.code("對手")
+
+    def count(self, action, player, sign=1):
+        """把一筆事件 (代碼) 計入 (sign=1) 或扣出 (sign=-1)"""
+        cb = self.codebook
+        row, total = cb.row_of[action], cb.total_of[action]
+        short = cb.short_of[player]
+        self.players[short] += sign
+
+        cells = self.cells
+        for col in ((short,) if short == self.opponent else (short, TOTAL_COL)):
+            cells[(row, col)] += sign
+            if total != NO_CODE: cells[(total, col)] += sign
+
+    def columns(self, seen_players):
+        cols = list(seen_players) + ["Total"]
+        if self.players[self.opponent] > 0: cols.append("對手")
+        return cols
+
+    def table(self, seen_players):
+        """回傳 (列名, 欄名, 數值)；列: ORDERED_ROWS + 加總列，欄: 出現過的球員 + Total + 對手"""
+        cb = self.codebook
+        cols = self.columns(seen_players)
+        row_codes = [cb.rows.get(r) for r in STATS_ROWS]
+        col_codes = [TOTAL_COL if c == "Total" else cb.shorts.get(c) for c in cols]
+        cells = self.cells
+        return STATS_ROWS, cols, [[cells[(r, c)] for c in col_codes] for r in row_codes]
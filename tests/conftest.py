@@ -0,0 +1,39 @@
+"""
+測試共用：內建名單、動作按鍵、隨機按鍵與事件 key
+"""
+import pytest
+
+from recorder import ROSTER_DB, ACTION_EFFECTS, roster_label
+
+
+@pytest.fixture
+def players():
+    """內建名單的顯示字串"""
+    return [roster_label(p) for p in ROSTER_DB]
+
+
+@pytest.fixture
+def lineup(players):
+    """先發 (6 + 自由球員)"""
+    return players[:7]
+
+
+@pytest.fixture
+def actions():
+    """記分端的動作按鍵"""
+    return list(ACTION_EFFECTS)
+
+
+@pytest.fixture
+def tap(players, actions):
+    """tap(rng, match)：隨機按一個動作鍵 (對手失誤不選球員)"""
+    def tap(rng, match):
+        action = rng.choice(actions)
+        match.log(action, None if "對手" in action else rng.choice(players))
+    return tap
+
+
+@pytest.fixture
+def keys():
+    """keys(match)：每筆事件的 key (時間, 球員代碼, 動作代碼, 時戳)，比對兩個 Match 用"""
+    return lambda match: [match.events.key(i) for i in range(len(match))]
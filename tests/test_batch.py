@@ -0,0 +1,48 @@
+"""
+批次分析：單局 / 多局活頁簿重新讀入後合併的總表等於各局統計矩陣的加總；
+沒變動的檔案不重讀，壞檔記在 errors、下次照樣重試。
+"""
+import random
+from collections import Counter
+
+from recorder import Match, build_workbook
+from recorder.batch import run, merge, merge_rallies
+
+
+def random_match(seed, lineup, tap, n=80):
+    rng = random.Random(seed)
+    match = Match(lineup=lineup)
+    for _ in range(n):
+        tap(rng, match)
+    return match
+
+
+def cells(table):
+    rows, cols, values = table
+    return Counter({(r, c): v for r, line in zip(rows, values) for c, v in zip(cols, line) if v})
+
+
+def test_merge_and_manifest(tmp_path, lineup, tap):
+    matches = {("A_G1.xlsx", 1): random_match(1, lineup, tap)}
+    matches.update({("B.xlsx", n): random_match(n + 1, lineup, tap) for n in (1, 2)})
+    (tmp_path / "A_G1.xlsx").write_bytes(build_workbook([(1, matches[("A_G1.xlsx", 1)])]))
+    (tmp_path / "B.xlsx").write_bytes(build_workbook([(n, matches[("B.xlsx", n)]) for n in (1, 2)]))
+    (tmp_path / "bad_G3.xlsx").write_bytes(b"not a workbook")
+
+    files, errors, reread = run(str(tmp_path), jobs=2)
+    assert reread == 3 and list(errors) == ["bad_G3.xlsx"]
+    assert {rel: [s["set"] for s in e["sets"]] for rel, e in files.items()} == {"A_G1.xlsx": [1], "B.xlsx": [1, 2]}
+
+    expected = Counter()
+    for match in matches.values():
+        expected.update(cells(match.stats.table(match.seen_players)))
+    assert cells(merge(files)) == expected
+    assert merge_rallies(files) == [sum(x) for x in zip(*(m.rallies.rally_counts() for m in matches.values()))]
+
+    files, errors, reread = run(str(tmp_path), jobs=1)
+    assert reread == 1 and list(errors) == ["bad_G3.xlsx"]  # 只重試壞檔
+    assert cells(merge(files)) == expected
+
+    (tmp_path / "bad_G3.xlsx").write_bytes(build_workbook([(3, matches[("A_G1.xlsx", 1)])]))
+    files, errors, reread = run(str(tmp_path), jobs=1)
+    assert reread == 1 and not errors and files["bad_G3.xlsx"]["sets"][0]["set"] == 3
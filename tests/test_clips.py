@@ -0,0 +1,66 @@
+"""
+剪輯清單：統計列 / 加總列 / 球員 / 影片時間的篩選，以及紀錄明細新增列 (沒有時戳) 的對時
+"""
+import pytest
+
+from recorder import SCORE_ROWS_LIST, SCORE_TOTAL_ROW, ERROR_TOTAL_ROW, Match, anchor_at, clip_list, clips_edl
+
+SECOND = 10 ** 9
+BASE = 1_700_000_000 * SECOND  # 任意一個真實的時刻
+
+
+@pytest.fixture
+def match(lineup):
+    """每 10 秒一筆"""
+    match = Match(lineup=lineup)
+    for k, (action, player) in enumerate([
+        ("發球", lineup[0]), ("攔網得分", lineup[1]), ("攻擊出界", lineup[2]), ("對手發球出界", "對手"),
+        ("吊球得分", lineup[1]), ("攻擊被攔", lineup[0]),
+    ]):
+        match.record_event({"時間": "10:00:00", "球員": player, "原始動作": action, "時戳": BASE + (k + 1) * 10 * SECOND})
+    return match
+
+
+def actions(clips):
+    return [c["原始動作"] for c in clips]
+
+
+def test_total_rows_expand(match):
+    anchor = (BASE, 0.0)
+    assert actions(clip_list(match, anchor, rows=[SCORE_TOTAL_ROW])) == ["攔網得分", "吊球得分"]
+    assert actions(clip_list(match, anchor, rows=[ERROR_TOTAL_ROW])) == ["攻擊出界", "攻擊被攔"]
+    assert actions(clip_list(match, anchor, rows=SCORE_ROWS_LIST)) == ["攔網得分", "吊球得分"]
+    assert actions(clip_list(match, anchor, rows=["攔網得分"])) == ["攔網得分"]
+
+
+def test_player_and_time_filters(match):
+    anchor = (BASE, 0.0)
+    assert actions(clip_list(match, anchor, players=["2"])) == ["攔網得分", "吊球得分"]
+    assert actions(clip_list(match, anchor, players=["對手"])) == ["對手發球出界"]
+    clips = clip_list(match, anchor, start=15, end=35)
+    assert actions(clips) == ["攔網得分", "攻擊出界"]
+    assert clips[0]["影片開始"] == 15.0 and clips[0]["影片結束"] == 23.0
+
+
+def test_added_row_gets_neighbouring_stamp(match, lineup):
+    """紀錄明細新增的列 (沒有時戳) 排在第一筆之前，時戳緊貼在第一筆前面，不是 1970 年"""
+    first = match.events.stamps[0]
+    match.apply_editor_delta({"added_rows": [{"時間": "09:59:55", "球員": lineup[3], "原始動作": "攔網"}]})
+    assert match.events.record(0)["原始動作"] == "攔網"
+    assert first - SECOND < match.events.stamps[0] < match.events.stamps[1] == first
+
+    anchor = anchor_at(match, 60, 1)
+    clips = clip_list(match, anchor)
+    assert clips[0]["影片結束"] == pytest.approx(60 + 3, abs=1e-6)
+    assert [c["影片開始"] for c in clips][1:] == pytest.approx([55, 65, 75, 85, 95, 105])
+
+
+def test_edl_record_timecodes(match):
+    """片段依序接在時間軸上；影片開始之前的事件沒有畫面，不寫進 EDL"""
+    clips = clip_list(match, (BASE + 25 * SECOND, 0.0))  # 第 3 筆 (30 秒) 在影片第 5 秒
+    assert [c["影片結束"] for c in clips[:3]] == pytest.approx([-12, -2, 8])
+    edl = clips_edl(clips, fps=25)
+    events = [line.split() for line in edl.splitlines() if line[:3].isdigit()]
+    assert [e[0] for e in events] == ["003", "004", "005", "006"]
+    assert events[0][-4:] == ["00:00:00:00", "00:00:08:00", "00:00:00:00", "00:00:08:00"]
+    assert events[1][-4:] == ["00:00:10:00", "00:00:18:00", "00:00:08:00", "00:00:16:00"]
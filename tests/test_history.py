@@ -0,0 +1,69 @@
+"""
+復原 / 重做：隨機操作後與整段重建一致；全部復原回到空白、全部重做回到原狀
+"""
+import random
+
+import pytest
+
+from recorder import Match
+
+
+def snapshot(match, keys):
+    return keys(match), (match.my_score, match.opp_score), +match.stats.cells, match.rallies.rally_counts()
+
+
+def rebuild(match, keys):
+    fresh = Match(lineup=list(match.rallies.court))
+    for key in keys(match):
+        fresh.append(*key)
+    return fresh
+
+
+def random_step(rng, match, actions, tap):
+    op = rng.random()
+    if op < 0.5 or len(match) < 2:
+        tap(rng, match)
+    elif op < 0.65:
+        match.apply_editor_delta({"edited_rows": {rng.randrange(len(match)): {"原始動作": rng.choice(actions)}}})
+    elif op < 0.85:
+        match.undo()
+    else:
+        match.redo()
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_random_undo_redo_match_rebuild(seed, lineup, actions, tap, keys):
+    rng = random.Random(seed)
+    match = Match(lineup=lineup)
+    for step in range(200):
+        random_step(rng, match, actions, tap)
+        if step % 10 == 0: assert snapshot(match, keys) == snapshot(rebuild(match, keys), keys)
+    assert snapshot(match, keys) == snapshot(rebuild(match, keys), keys)
+
+
+def test_undo_all_then_redo_all(lineup, actions, tap, keys):
+    rng = random.Random(7)
+    match = Match(lineup=lineup)
+    for _ in range(100):
+        random_step(rng, match, actions, tap)
+    while match.redo() is not None:
+        pass
+    done = snapshot(match, keys)
+    while match.undo() is not None:
+        pass
+    assert len(match) == 0 and (match.my_score, match.opp_score) == (0, 0)
+    assert not +match.stats.cells and len(match.rallies) == 0
+    while match.redo() is not None:
+        pass
+    assert snapshot(match, keys) == done
+
+
+def test_undo_returns_context_and_new_action_clears_redo(lineup):
+    match = Match(lineup=lineup)
+    match.log("發球", lineup[0], context=lineup[0])
+    match.log("攻擊得分", lineup[1], context=lineup[1])
+    assert match.undo() == (1, lineup[1])
+    assert match.history.can_redo
+    match.log("攻擊出界", lineup[2])
+    assert not match.history.can_redo and match.redo() is None
+    assert [r["原始動作"] for r in match.events.records()] == ["發球", "攻擊出界"]
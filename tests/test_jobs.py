@@ -0,0 +1,66 @@
+"""
+背景匯出：相同 key 沿用、失敗後重做、只留最近幾個做好的檔案
+"""
+import threading
+import time
+
+import pytest
+
+from recorder import ExportPool
+
+
+def wait(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.pending:
+        assert time.time() < deadline, f"{job.label} 沒有做完"
+        time.sleep(0.005)
+    return job
+
+
+@pytest.fixture
+def pool():
+    pool = ExportPool(workers=2, keep=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_same_key_is_reused(pool):
+    release = threading.Event()
+    calls = []
+
+    def build(report):
+        calls.append(1)
+        report(0.5)
+        release.wait(5)
+        return b"data"
+
+    job = pool.submit("k", build, "G1")
+    assert pool.submit("k", build, "G1") is job and job.pending and pool.pending()
+    release.set()
+    wait(job)
+    assert pool.submit("k", build, "G1") is job
+    assert calls == [1] and job.status == "done" and job.progress == 1.0 and job.data == b"data"
+    assert job.finished >= job.submitted and not pool.pending() and pool.nbytes() == 4
+
+
+def test_failed_job_is_retried(pool):
+    def broken(report):
+        raise ValueError("壞掉")
+
+    job = wait(pool.submit("k", broken, "G1"))
+    assert job.status == "error" and job.error == "壞掉" and job.data is None
+    retry = wait(pool.submit("k", lambda report: b"ok", "G1"))
+    assert retry is not job and retry.status == "done" and pool.jobs() == [retry]
+
+
+def test_keeps_latest_done_jobs(pool):
+    release = threading.Event()
+    running = pool.submit("slow", lambda report: release.wait(5) and b"slow", "slow")
+    for k in range(4):
+        wait(pool.submit(k, lambda report, k=k: bytes([k]), f"G{k}"))
+    # 做好的只留最近 keep=2 個 (最後一次 submit 時整理，最新的那個不算在內)，還在做的不動
+    assert [j.key for j in pool.jobs()] == [3, 2, 1, "slow"]
+    release.set()
+    wait(running)
+    wait(pool.submit(4, lambda report: b"4", "G4"))
+    assert [j.key for j in pool.jobs()] == [4, 3, 2]
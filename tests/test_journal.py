@@ -0,0 +1,55 @@
+"""
+事件日誌：關閉後重新開啟 (快照 + 之後的日誌) 還原的紀錄要和寫入時的比賽相同
+"""
+import random
+
+import pytest
+
+from recorder import Match, EventJournal
+
+
+def restore(records):
+    match = Match()
+    for record in records:
+        match.record_event(record)
+    return match
+
+
+@pytest.mark.parametrize("snapshot_every", [3, 1000])
+def test_reopen_restores_keys(tmp_path, snapshot_every, actions, tap, keys):
+    path = str(tmp_path / "journal.sqlite3")
+    rng = random.Random(snapshot_every)
+    match = Match()
+    journal = EventJournal(path, snapshot_every=snapshot_every)
+    journal.set_meta({"match_name": "練習賽", "opponent": "某隊"})
+    for _ in range(150):
+        n = len(match)
+        if rng.random() < 0.8 or n < 2:
+            tap(rng, match)
+            journal.append(match.events.record(len(match) - 1))
+        else:
+            start = match.apply_editor_delta({"edited_rows": {rng.randrange(n): {"原始動作": rng.choice(actions)}}})
+            journal.replace(start, match.events.records(start))
+        if rng.random() < 0.05:
+            start, _ = match.undo()
+            journal.replace(start, match.events.records(start))
+    journal.close()
+
+    journal = EventJournal(path, snapshot_every=snapshot_every)
+    records, meta = journal.load()
+    journal.close()
+    assert meta == {"match_name": "練習賽", "opponent": "某隊"}
+    assert keys(restore(records)) == keys(match)
+
+
+def test_reset_clears(tmp_path, players, actions):
+    path = str(tmp_path / "journal.sqlite3")
+    journal = EventJournal(path, snapshot_every=2)
+    for action in actions[:5]:
+        journal.append({"時間": "10:00:00", "球員": players[0], "原始動作": action})
+    journal.reset()
+    journal.close()
+
+    journal = EventJournal(path)
+    assert journal.load() == ([], None)
+    journal.close()
@@ -0,0 +1,61 @@
+"""
+紀錄明細的增量編輯與整段重建一致：隨機的 按鍵 / 修改 / 刪除 / 新增 之後，
+事件陣列、比分與統計矩陣都要和「用同樣的事件從頭建一個 Match」相同。
+"""
+import random
+
+import pytest
+
+from recorder import Match
+
+
+def rebuild(match, keys):
+    fresh = Match(lineup=list(match.rallies.court))
+    for key in keys(match):
+        fresh.append(*key)
+    return fresh
+
+
+def assert_rebuilt(match, keys):
+    fresh = rebuild(match, keys)
+    for col in ("times", "stamps", "players", "actions", "my", "opp"):
+        assert getattr(match.events, col) == getattr(fresh.events, col), col
+    assert (match.my_score, match.opp_score) == (fresh.my_score, fresh.opp_score)
+    assert +match.stats.cells == +fresh.stats.cells
+    assert +match.stats.players == +fresh.stats.players
+
+
+def random_edit(rng, match, players, actions):
+    """紀錄明細的一次變動 (data_editor 的 delta，列位置新的在上)"""
+    n = len(match)
+    op = rng.random()
+    if op < 0.3:
+        match.apply_editor_delta({"deleted_rows": rng.sample(range(n), rng.randint(1, min(3, n)))})
+    elif op < 0.8:
+        changes = rng.choice([{"原始動作": rng.choice(actions)}, {"球員": rng.choice(players + ["對手"])}])
+        match.apply_editor_delta({"edited_rows": {rng.randrange(n): changes}})
+    else:
+        match.apply_editor_delta({"added_rows": [{"時間": "09:00:00", "球員": rng.choice(players), "原始動作": rng.choice(actions)}]})
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_random_edits_match_rebuild(seed, lineup, players, actions, tap, keys):
+    rng = random.Random(seed)
+    match = Match(lineup=lineup)
+    for step in range(200):
+        if rng.random() < 0.6 or len(match) < 2:
+            tap(rng, match)
+        else:
+            random_edit(rng, match, players, actions)
+        if step % 20 == 0: assert_rebuilt(match, keys)
+    assert_rebuilt(match, keys)
+
+
+def test_unfinished_added_row_is_ignored(lineup, players, tap, keys):
+    rng = random.Random(1)
+    match = Match(lineup=lineup)
+    for _ in range(10):
+        tap(rng, match)
+    before, version = keys(match), match.version
+    assert match.apply_editor_delta({"added_rows": [{"球員": players[0]}]}) is None
+    assert keys(match) == before and match.version == version
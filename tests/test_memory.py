@@ -0,0 +1,35 @@
+"""
+session 快取：版本失效、預算淘汰、閒置清除
+"""
+import gc
+
+from recorder import SessionCache, SessionRegistry
+
+
+def test_version_and_budget():
+    cache = SessionCache(budget_kib=10)
+    cache.get("a", 1, lambda: b"x" * 6000)
+    cache.get("b", 1, lambda: b"y" * 6000)
+    assert list(cache.entries) == ["b"] and cache.evictions == 1
+    assert cache.get("b", 1, lambda: b"rebuilt") == b"y" * 6000
+    assert cache.get("b", 2, lambda: b"rebuilt") == b"rebuilt"
+
+
+def test_reads_do_not_keep_session_alive():
+    """輪詢的 fragment 只讀快取 (get)，不算使用：閒置時間到了照樣清掉"""
+    registry = SessionRegistry()
+    cache = SessionCache()
+    registry.register("s1", cache)
+    cache.get("t", 1, lambda: b"z" * 100000)
+    cache.last_seen -= 3600
+    cache.get("t", 1, lambda: b"")
+    assert registry.trim_idle(60) > 90 and not cache.entries
+
+    cache.get("t", 2, lambda: b"z" * 100000)
+    cache.last_seen -= 3600
+    cache.touch()
+    assert registry.trim_idle(60) == 0 and cache.entries
+
+    del cache
+    gc.collect()
+    assert registry.rows() == []
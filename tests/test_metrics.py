@@ -0,0 +1,101 @@
+"""
+效率指標：手算的公式、跨局的 Sideout / Break、單局 (事件陣列) 與統計表兩條路徑一致
+"""
+import datetime
+import random
+
+import pytest
+
+from recorder import STATS_ROWS, METRIC_ROWS, Match, SeasonStore, match_metrics, metrics_from_stats
+from recorder.metrics import rally_counts
+
+
+def metric(table, name, col):
+    rows, cols, values = table
+    return values[rows.index(name)][cols.index(col)]
+
+
+def stats_grid(cols, counts):
+    """{(統計列, 欄): 次數} -> StatsMatrix.table 格式"""
+    return STATS_ROWS, cols, [[counts.get((row, col), 0) for col in cols] for row in STATS_ROWS]
+
+
+def test_formulas_by_hand():
+    counts = {
+        # 2 號攻擊：得分 3、失誤 1、被攔 1、繼續 1
+        ("直接得分", "2"): 2, ("打手得分", "2"): 1, ("攻擊出界", "2"): 1, ("攻擊被攔", "2"): 1, ("攻擊擊球繼續", "2"): 1,
+        # 7 號接發：A 3、B 1、失誤 1
+        ("接發好球繼續", "7"): 3, ("接發繼續", "7"): 1, ("接發失誤", "7"): 1,
+        # 1 號發球：得分 1、失誤 1、繼續 2
+        ("發球得分", "1"): 1, ("發球出界", "1"): 1, ("發球繼續", "1"): 2,
+        ("對手失誤(總計)", "對手"): 4,
+    }
+    for (row, col), n in list(counts.items()):
+        if col != "對手": counts[(row, "Total")] = counts.get((row, "Total"), 0) + n
+    table = metrics_from_stats(*stats_grid(["1", "2", "7", "Total", "對手"], counts), rallies=(4, 3, 5, 2))
+
+    assert table[0] == METRIC_ROWS and table[1] == ["1", "2", "7", "Total"]
+    assert metric(table, "攻擊次數", "2") == 6
+    assert metric(table, "攻擊效率", "2") == pytest.approx(0.167)       # (3 - 1 - 1) / 6
+    assert metric(table, "攻擊得分率", "2") == 50.0
+    assert metric(table, "接發次數", "7") == 5
+    assert [metric(table, m, "7") for m in ("接發A%", "接發B%", "接發失誤%")] == [60.0, 20.0, 20.0]
+    assert [metric(table, m, "1") for m in ("發球次數", "發球得分%", "發球失誤%")] == [4, 25.0, 25.0]
+    assert metric(table, "攻擊效率", "Total") == pytest.approx(0.167)
+    # 沒有攻擊 / 接發的球員算不出比例；Sideout / Break 只在 Total
+    assert metric(table, "攻擊效率", "7") is None and metric(table, "接發A%", "2") is None
+    assert metric(table, "Sideout%", "Total") == 75.0 and metric(table, "Break%", "Total") == 40.0
+    assert metric(table, "Sideout%", "2") is None
+
+
+def test_rally_counts_across_sets():
+    # 第 1 局我方先發球：得、失、失、得；第 2 局對手先發球：失、得
+    effects = [1, -1, -1, 1, -1, 1]
+    first_point = [1, 0, 0, 0, 1, 0]
+    first_server = [1, 1, 1, 1, -1, -1]
+    assert rally_counts(effects, first_point, first_server) == (4, 2, 2, 1)
+    assert rally_counts(effects, first_point, first_server, mask=[1, 1, 0, 0, 1, 1]) == (2, 1, 2, 1)
+    assert rally_counts([], [], []) == (0, 0, 0, 0)
+
+
+def test_season_rallies(tmp_path, lineup):
+    season = SeasonStore(str(tmp_path / "season.sqlite3"))
+    meta = {"match_name": "聯賽", "date": datetime.date(2026, 3, 1), "opponent": "某隊"}
+    p = lineup[1]
+    sets = {
+        1: [("發球", p), ("攻擊得分", p), ("攻擊出界", p), ("接發A", p), ("攻擊出界", p), ("接發B", p), ("攻擊得分", p)],
+        2: [("接發A", p), ("攻擊出界", p), ("對手攻擊出界", "對手")],
+    }
+    try:
+        matches = {}
+        for set_no, events in sets.items():
+            match = matches[set_no] = Match(lineup=lineup)
+            for action, player in events:
+                match.log(action, None if player == "對手" else player)
+            season.save_set(meta, set_no, match)
+        assert season.rallies(set_no=1) == matches[1].rallies.rally_counts() == (2, 1, 2, 1)
+        assert season.rallies(set_no=2) == matches[2].rallies.rally_counts() == (2, 1, 0, 0)
+        assert season.rallies() == (4, 2, 2, 1)
+        assert season.rallies(opponent="別隊") == (0, 0, 0, 0)
+        assert metric(season.metrics(), "Sideout%", "Total") == 50.0
+    finally:
+        season.close()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_match_metrics_agree_with_stats_table(seed, lineup, actions, tap):
+    rng = random.Random(seed)
+    match = Match(lineup=lineup)
+    for _ in range(300):
+        tap(rng, match)
+    n = len(match)
+    match.apply_editor_delta({"edited_rows": {rng.randrange(n): {"原始動作": rng.choice(actions)}}, "deleted_rows": [0]})
+    expected = metrics_from_stats(*match.stats.table(match.seen_players), match.rallies.rally_counts())
+    assert match_metrics(match) == expected
+
+
+def test_empty_match(lineup):
+    table = match_metrics(Match(lineup=lineup))
+    assert table[1] == [label.split(" - ")[0] for label in lineup] + ["Total"]
+    for name, line in zip(*table[::2]):
+        assert all(v == 0 for v in line) if name.endswith("次數") else all(v is None for v in line)
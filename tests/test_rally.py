@@ -0,0 +1,73 @@
+"""
+回合索引：手算的回合 / 輪轉，以及編輯後 (從回合中間截斷重餵) 與整段重建一致
+"""
+import random
+
+import pytest
+
+from recorder import Match
+
+
+def rally_state(match):
+    """回合索引的所有欄位 (陣容代碼換回陣容，兩個 Match 的代碼表不必相同)"""
+    r = match.rallies
+    return {
+        "columns": [list(col) for col in (r.starts, r.ends, r.servers, r.outcomes, r.rotations, r.receptions, r.event_rally)],
+        "lineups": [r.lineup_codes.label(c) for c in r.lineups],
+        "by_rotation": {k: list(v) for k, v in r.by_rotation.items()},
+        "counts": +r.counts, "reception_counts": +r.reception_counts,
+        "state": (r.next_server, r.rotation, r.open),
+    }
+
+
+def test_hand_computed_rallies(lineup):
+    match = Match(lineup=lineup)
+    p1, p2, p3 = lineup[:3]
+    for action, player in [
+        ("接發A", p2), ("攻擊得分", p3),     # 回合 0：對手發球，接發 A、Sideout -> 輪轉 2
+        ("發球", p2), ("攻擊出界", p3),      # 回合 1：我方發球失分 (Break 失敗)
+        ("接發B", p1), ("對手攻擊出界", None),  # 回合 2：對手發球，Sideout -> 輪轉 3
+        ("發球得分", p3),                    # 回合 3：我方發球得分 (Break)，沒有輪轉
+        ("攻擊被攔", p1),                    # 回合 4：我方發球失分
+    ]:
+        match.log(action, player)
+    r = match.rallies
+    assert list(r.servers) == [-1, 1, -1, 1, 1]
+    assert list(r.outcomes) == [1, -1, 1, 1, -1]
+    assert list(r.rotations) == [1, 2, 2, 3, 3]
+    assert list(r.starts) == [0, 2, 4, 6, 7] and list(r.ends) == [2, 4, 6, 7, 8]
+    assert r.rally(0)["lineup"] == tuple(lineup[:6])
+    assert r.rally(1)["lineup"] == tuple(lineup[1:6] + lineup[:1])
+    assert r.rally_counts() == (2, 2, 3, 1)
+    assert r.sideout_by_reception() == {"接發A": (1, 1), "接發B": (1, 1)}
+    assert r.rotation_table()[1] == [2, 2, 1, 1, 1, 1, 1, 0]
+    assert r.event_rotations() == [1, 1, 2, 2, 2, 2, 3, 3]
+    assert r.current == (3, -1)
+
+
+def test_first_rally_server():
+    assert Match().rallies.current == (1, None)
+    match = Match()
+    match.log("發球", match.roster.labels[0])
+    assert match.rallies.current == (1, 1)
+    match = Match()
+    match.log("接發A", match.roster.labels[0])
+    assert match.rallies.current == (1, -1)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rallies_after_edits_match_rebuild(seed, lineup, actions, tap, keys):
+    rng = random.Random(seed)
+    match = Match(lineup=lineup)
+    for _ in range(150):
+        n = len(match)
+        if rng.random() < 0.7 or n < 2:
+            tap(rng, match)
+        elif rng.random() < 0.5:
+            match.apply_editor_delta({"deleted_rows": [rng.randrange(n)]})
+        else:
+            match.apply_editor_delta({"edited_rows": {rng.randrange(n): {"原始動作": rng.choice(actions)}}})
+    fresh = Match(lineup=lineup)
+    for key in keys(match):
+        fresh.append(*key)
+    assert rally_state(match) == rally_state(fresh)
@@ -0,0 +1,34 @@
+"""
+名單載入：CSV / JSON、多隊、不足 7 人的名單
+"""
+import json
+
+import pytest
+
+from recorder import load_roster, Match
+
+
+def test_short_roster(tmp_path):
+    path = tmp_path / "roster.json"
+    path.write_text(json.dumps([
+        {"背號": "1", "姓名": "甲", "位置": "S"}, {"number": 2, "name": "乙", "position": "OH"},
+    ], ensure_ascii=False), encoding="utf-8")
+    roster = load_roster(str(path))
+    assert roster.labels == ["1 - 甲 (S)", "2 - 乙 (OH)"]
+    lineup = roster.labels[:7]
+    match = Match(roster, lineup)
+    match.log("攔網得分", lineup[1])
+    assert match.stats_table().loc["攔網得分", "2"] == 1
+
+
+def test_teams_and_errors(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text("隊伍,背號,姓名,位置\nA,1,甲,S\nB,1,乙,L\n", encoding="utf-8")
+    assert load_roster(str(path), "B").labels == ["1 - 乙 (L)"]
+    with pytest.raises(KeyError):
+        load_roster(str(path), "C")
+
+    empty = tmp_path / "empty.csv"
+    empty.write_text("背號,姓名,位置\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_roster(str(empty))
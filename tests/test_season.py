@@ -0,0 +1,61 @@
+"""
+賽季資料庫：save_set / load_set 來回一次，事件、比分與統計不變；同一局再存一次就取代
+"""
+import datetime
+import random
+
+import pytest
+
+from recorder import Match, SeasonStore
+
+META = {"match_name": "聯賽", "date": datetime.date(2026, 3, 1), "opponent": "某隊"}
+
+
+@pytest.fixture
+def season(tmp_path):
+    season = SeasonStore(str(tmp_path / "season.sqlite3"))
+    yield season
+    season.close()
+
+
+@pytest.fixture
+def random_match(lineup, tap):
+    def random_match(seed, n=120):
+        rng = random.Random(seed)
+        match = Match(lineup=lineup)
+        for _ in range(n):
+            tap(rng, match)
+        return match
+    return random_match
+
+
+def test_save_load_round_trip(season, random_match, lineup, keys):
+    match = random_match(1)
+    season.save_set(META, 1, match)
+    loaded = season.load_set(META, 1, lineup)
+    assert keys(loaded) == keys(match)
+    assert loaded.events.records() == match.events.records()
+    assert loaded.stats_table().equals(match.stats_table())
+    assert season.match_sets(META) == [1]
+
+
+def test_save_replaces_set(season, random_match, lineup, keys):
+    season.save_set(META, 1, random_match(1))
+    match = random_match(2, 40)
+    season.save_set(META, 1, match)
+    assert keys(season.load_set(META, 1, lineup)) == keys(match)
+    assert [s["events"] for s in season.sets()] == [40]
+    assert len(season.load_set(META, 2, lineup)) == 0
+
+
+def test_counts_across_sets(season, lineup):
+    for set_no, actions in [(1, ["攔網得分", "攔網得分", "攻擊出界"]), (2, ["攔網得分", "發球"])]:
+        match = Match(lineup=lineup)
+        for action in actions:
+            match.log(action, lineup[3])
+        season.save_set(META, set_no, match)
+    assert season.count(player="4", row="攔網得分") == 3
+    assert season.count(player="4", row="攔網得分", set_no=2) == 1
+    assert season.count(player="4", row="個人得分總和", opponent="某隊") == 3
+    assert season.count(player="4", row="個人失分總和") == 1
+    assert season.count(row="攔網得分", opponent="別隊") == 0
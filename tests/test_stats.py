@@ -0,0 +1,129 @@
+"""
+統計矩陣與舊版 recalculate_scores + pivot_table 的結果一致
+
+legacy_* 照搬改版前 LogsAPP.py 的寫法 (逐筆重算比分、DataFrame 樞紐表)，當作對照組。
+"""
+import random
+
+import pandas as pd
+import pytest
+
+from recorder import ORDERED_ROWS, SCORE_ROWS_LIST, ERROR_ROWS_LIST, ACTION_EFFECTS, ACTION_MAP, Match
+
+
+def random_logs(rng, n, players, actions):
+    """[(時間, 選中的球員, 原始動作)]，對手失誤不選球員；球員偶爾是替補；動作另含紀錄明細才選得到的 對手接噴"""
+    actions = actions + ["對手接噴"]
+    logs = []
+    for k in range(n):
+        action = rng.choice(actions)
+        player = None if "對手" in action and action != "對手接噴" else rng.choice(players)
+        logs.append((f"10:{k // 60 % 60:02d}:{k % 60:02d}", player, action))
+    return logs
+
+
+def legacy_seen(logs, lineup):
+    """舊版 seen_players：先發加上紀錄過的球員 (存在 session_state，刪紀錄也不會少)"""
+    seen = [p.split(" - ")[0] for p in lineup]
+    for _, player, _ in logs:
+        if player and player.split(" - ")[0] not in seen and "對手" not in player:
+            seen.append(player.split(" - ")[0])
+    return seen
+
+
+def legacy_recalculate(logs):
+    """舊版 log_event + recalculate_scores：回傳 (依時間順序的紀錄, 我方, 對手)"""
+    records = []
+    for seconds, player, raw_action in logs:
+        final_player = "對手" if "對手" in raw_action and raw_action not in ["對手接噴"] else player
+        records.append({"時間": seconds, "球員": final_player, "原始動作": raw_action})
+
+    my = opp = 0
+    for log in records:
+        raw_action = log["原始動作"]
+        effect = ACTION_EFFECTS.get(raw_action, 0)
+        if "對手" in raw_action and raw_action in ACTION_EFFECTS: effect = 1
+        res_str, score_str = "繼續", ""
+        if effect == 1:
+            my += 1
+            res_str, score_str = "得分", f"{my}:{opp}"
+        elif effect == -1:
+            opp += 1
+            res_str, score_str = "失誤", f"{my}:{opp}"
+        log["結果"] = res_str
+        log["比分"] = score_str
+        stats_name = ACTION_MAP.get(raw_action, raw_action)
+        if "對手" in raw_action and raw_action not in ["對手接噴"]:
+            stats_name = "對手失誤(總計)"
+        log["動作"] = stats_name
+    return records, my, opp
+
+
+def legacy_pivot(records, seen):
+    """舊版統計表 (pivot_table + 加總列)"""
+    df = pd.DataFrame(records)
+    df["ShortName"] = df["球員"].apply(lambda p: "對手" if "對手" in p else p.split(" - ")[0])
+    stats = df.pivot_table(index="動作", columns="ShortName", aggfunc="size", fill_value=0)
+    final_cols = list(seen)
+    for p in final_cols:
+        if p not in stats.columns: stats[p] = 0
+    stats["Total"] = stats[[c for c in final_cols if c in stats.columns]].sum(axis=1)
+    final_cols.append("Total")
+    if "對手" in stats.columns: final_cols.append("對手")
+    stats = stats.reindex(columns=final_cols, fill_value=0)
+    stats = stats.reindex(ORDERED_ROWS, fill_value=0)
+    stats.loc["個人得分總和"] = stats[stats.index.isin(SCORE_ROWS_LIST)].sum()
+    stats.loc["個人失分總和"] = stats[stats.index.isin(ERROR_ROWS_LIST)].sum()
+    return stats
+
+
+def build_match(logs, lineup):
+    match = Match(lineup=lineup)
+    for seconds, player, action in logs:
+        if player: match.see_player(player)
+        match.record_event({"時間": seconds, "球員": "對手" if "對手" in action and action != "對手接噴" else player,
+                            "原始動作": action})
+    return match
+
+
+def assert_same(match, logs, seen):
+    records, my, opp = legacy_recalculate(logs)
+    assert (match.my_score, match.opp_score) == (my, opp)
+    for got, want in zip(match.events.records(), records):
+        assert {k: got[k] for k in ("球員", "動作", "結果", "比分")} == {k: want[k] for k in ("球員", "動作", "結果", "比分")}
+
+    got = match.stats_table()
+    want = legacy_pivot(records, seen)
+    assert list(got.index) == list(want.index)
+    assert list(got.columns) == list(want.columns)
+    assert got.to_numpy().tolist() == want.to_numpy().tolist()
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_matches_legacy_pivot(seed, players, lineup, actions):
+    rng = random.Random(seed)
+    logs = random_logs(rng, rng.randint(1, 150), players, actions)
+    assert_same(build_match(logs, lineup), logs, legacy_seen(logs, lineup))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_legacy_pivot_after_edits(seed, players, lineup, actions):
+    """紀錄明細刪除 / 修改後，增量扣回的統計仍與整段重做樞紐表相同"""
+    rng = random.Random(1000 + seed)
+    logs = random_logs(rng, rng.randint(5, 100), players, actions)
+    match = build_match(logs, lineup)
+    seen = legacy_seen(logs, lineup)
+    for _ in range(5):
+        n = len(logs)
+        if n < 2: break
+        pos = rng.randrange(n)
+        i = n - 1 - pos  # 表格新的在上
+        if rng.random() < 0.5:
+            match.apply_editor_delta({"deleted_rows": [pos]})
+            del logs[i]
+        else:
+            action = rng.choice([a for a in actions if "對手" not in a])
+            match.apply_editor_delta({"edited_rows": {pos: {"原始動作": action}}})
+            seconds, player, _ = logs[i]
+            logs[i] = (seconds, player or match.events.record(i)["球員"], action)
+    assert_same(match, logs, seen)